@@ -0,0 +1,15 @@
+import hashlib
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def database_key(key, key_prefix, version):
+    """Ключ общего кэша, привязанный к основной базе.
+
+    Сессии и копии пользователей лежат под id из конкретной базы:
+    тесты на своей базе и рабочий сервер с тем же каталогом кэша
+    не должны видеть записи друг друга.
+    """
+    name = str(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+    database = hashlib.md5(name.encode()).hexdigest()[:8]
+    return f'{key_prefix}:{version}:{database}:{key}'
@@ -0,0 +1,90 @@
+import os
+
+from django.db.backends.sqlite3 import base
+
+# Прагмы для многопоточного сервера:
+# - WAL: читатели не ждут писателя, писатель не ждёт читателей;
+# - synchronous=NORMAL: с WAL теряется разве что последний коммит при
+#   отключении питания, но не целостность базы;
+# - mmap_size: страницы читаются из отображённого файла без копирования;
+# - busy_timeout: занятая база ожидается, а не отвечает сразу
+#   «database is locked».
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite-бэкенд с прагмами на каждом соединении.
+
+    В OPTIONS, кроме параметров sqlite3.connect, понимает:
+    - `pragmas`: словарь, дополняющий и переопределяющий DEFAULT_PRAGMAS;
+    - `transaction_mode`: IMMEDIATE берёт блокировку записи в начале
+      atomic(). С DEFERRED транзакция, которая сначала читает, а потом
+      пишет, получает «database is locked» сразу, минуя busy_timeout,
+      если другой писатель успел закоммитить.
+
+    Для CONN_MAX_AGE проверяет соединение перед повторным
+    использованием: файл базы на месте и отвечает на запрос.
+    """
+
+    file_id = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop('pragmas', {})}
+        self.transaction_mode = params.pop(
+            'transaction_mode', 'DEFERRED'
+        ).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(
+                f'Неизвестный transaction_mode: {self.transaction_mode}'
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        self.file_id = self._file_id()
+        return conn
+
+    def _file_id(self):
+        if self.is_in_memory_db():
+            return None
+        try:
+            stat = os.stat(self.settings_dict['NAME'])
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def is_usable(self):
+        if self.file_id != self._file_id():
+            # Файл удалили или подменили (восстановление из копии):
+            # старое соединение видит уже не ту базу.
+            return False
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Стандартная проверка зовёт is_usable только после ошибок;
+        # долгоживущее соединение проверяется перед каждым запросом.
+        if (
+            self.connection is not None
+            and self.settings_dict['CONN_MAX_AGE'] != 0
+            and not self.in_atomic_block
+            and not self.is_usable()
+        ):
+            self.close()
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,31 @@
+from contextlib import ExitStack, contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def read_snapshot(using=DEFAULT_DB_ALIAS):
+    """Транзакция для чтения: все запросы внутри видят один снимок базы.
+
+    Начинается с BEGIN DEFERRED даже при transaction_mode IMMEDIATE
+    (core.db.backends.sqlite3): в режиме WAL такой читатель не берёт
+    блокировку записи и не мешает писателям, сколько бы ни длился.
+    Внутри уже открытой транзакции снимок есть, и ничего не меняется.
+    """
+    connection = connections[using]
+    if connection.in_atomic_block:
+        yield
+        return
+    # Соединение открывается заранее: при подключении transaction_mode
+    # заново читается из OPTIONS.
+    connection.ensure_connection()
+    mode = getattr(connection, 'transaction_mode', None)
+    with ExitStack() as stack:
+        if mode is not None:
+            connection.transaction_mode = 'DEFERRED'
+        try:
+            stack.enter_context(transaction.atomic(using=using))
+        finally:
+            if mode is not None:
+                connection.transaction_mode = mode
+        yield
@@ -0,0 +1,185 @@
+import json
+import logging
+import math
+import time
+from statistics import mean, median
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.testing import named_urls
+from posts.models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+URL_NAMESPACES = ('posts', 'users', 'about')
+# Эти адреса меняют данные на GET: выход завершает сессию, а подписка
+# и отписка создают и удаляют Follow, перестраивают ленту читателя
+# и сбрасывают теги кэша. Замер от имени пользователя искажал бы
+# и их собственные цифры, и цифры всех страниц после них.
+SKIP_FOR_USER = {
+    'users:logout',
+    'posts:profile_follow',
+    'posts:profile_unfollow',
+}
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def sample_kwargs(user):
+    """Значения параметров адресов: самые нагруженные автор и группа
+    и последний пост — на них видна худшая задержка."""
+    stats = AuthorStats.objects.select_related('author').order_by(
+        '-posts_count'
+    ).first()
+    author = stats.author if stats else user
+    group = Group.objects.order_by('-posts_count').first()
+    post = Post.objects.order_by('-pk').first()
+    values = {
+        'username': author.username if author else None,
+        'slug': group.slug if group else None,
+        'post_id': post.pk if post else None,
+    }
+    if user is not None:
+        values['uidb64'] = urlsafe_base64_encode(force_bytes(user.pk))
+        values['token'] = default_token_generator.make_token(user)
+    return values
+
+
+def measure(client, url, requests, warmup, cold=False):
+    timings, queries, status = [], [], None
+    for number in range(warmup + requests):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        status = response.status_code
+        if number >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+    return {
+        'url': url,
+        'status': status,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(mean(timings), 3),
+        'queries': median(queries),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет p50/p95/p99 задержки и число SQL-запросов для всех '
+        'адресов posts, users и about, пишет результат в JSON и '
+        'сравнивает его с прошлым прогоном'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--user', help='Повторить замеры от имени этого пользователя'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом'
+        )
+        parser.add_argument('--output', help='Файл для результатов')
+        parser.add_argument('--compare', help='Результаты прошлого прогона')
+        parser.add_argument(
+            '--fail-over', type=float,
+            help='Ошибка, если p95 вырос больше чем на столько процентов '
+                 'или выросло число запросов'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один замер')
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {options["user"]}')
+        urls, skipped = named_urls(
+            sample_kwargs(user), namespaces=URL_NAMESPACES
+        )
+        # Ответы 403 и 404 ожидаемы и не должны засорять отчёт.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        clients = {'guest': Client()}
+        if user is not None:
+            clients['user'] = Client()
+            clients['user'].force_login(user)
+        results = {
+            'meta': {
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'cold': options['cold'],
+                'posts': Post.objects.count(),
+                'skipped': skipped,
+            }
+        }
+        for mode, client in clients.items():
+            results[mode] = {}
+            for name, url in urls.items():
+                if mode == 'user' and name in SKIP_FOR_USER:
+                    continue
+                results[mode][name] = measure(
+                    client, url, options['requests'], options['warmup'],
+                    options['cold']
+                )
+
+        report = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report)
+        else:
+            self.stdout.write(report)
+        if options['compare']:
+            self.compare(results, options['compare'], options['fail_over'])
+
+    def compare(self, results, path, fail_over):
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = []
+        for mode in ('guest', 'user'):
+            for name, current in results.get(mode, {}).items():
+                previous = baseline.get(mode, {}).get(name)
+                if previous is None:
+                    continue
+                change = 100 * (
+                    current['p95_ms'] / max(previous['p95_ms'], 1e-3) - 1
+                )
+                self.stdout.write(
+                    f'{mode:5} {name:32} p95 {previous["p95_ms"]:9.2f} -> '
+                    f'{current["p95_ms"]:9.2f} мс ({change:+.0f}%), '
+                    f'запросов {previous["queries"]} -> {current["queries"]}'
+                )
+                if fail_over is not None and (
+                    change > fail_over
+                    or current['queries'] > previous['queries']
+                ):
+                    regressions.append(f'{mode} {name}')
+        if regressions:
+            raise CommandError(
+                'Замедлились или стали делать больше запросов: '
+                + ', '.join(regressions)
+            )
@@ -0,0 +1,191 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    OperationalError,
+    connections,
+    transaction
+)
+from django.db.models import F
+
+from core.management.commands.bench import percentile
+from core.management.commands.sync_replicas import copy_database
+from posts.models import AuthorStats, Post
+
+User = get_user_model()
+
+# С чем сравнивается: стандартный SQLite-бэкенд Django с новым
+# соединением на каждый запрос и профиль из settings.py для DEBUG=False.
+PROFILES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+    },
+    'production': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    },
+}
+FEED_SIZE = 10
+
+
+@contextmanager
+def temporary_database(alias, settings_dict):
+    """Подключает базу под временным алиасом и убирает его следом,
+    вместе с соединением, которое ConnectionHandler запомнил для потока."""
+    connections.databases[alias] = settings_dict
+    try:
+        yield connections[alias]
+    finally:
+        connections[alias].close()
+        del connections.databases[alias]
+        if hasattr(connections._connections, alias):
+            delattr(connections._connections, alias)
+
+
+def read_feed(alias, author_id):
+    list(
+        Post.objects.using(alias).select_related('author', 'group')
+        .order_by('-pub_date', '-id')[:FEED_SIZE]
+    )
+
+
+def write_post(alias, author_id):
+    """Как post_create: чтение и запись в одной транзакции."""
+    with transaction.atomic(using=alias):
+        AuthorStats.objects.using(alias).filter(author_id=author_id).first()
+        Post.objects.using(alias).bulk_create(
+            [Post(author_id=author_id, text='Пост из бенчмарка')]
+        )
+        AuthorStats.objects.using(alias).filter(author_id=author_id).update(
+            posts_count=F('posts_count') + 1
+        )
+
+
+def worker(alias, author_id, deadline, write_ratio, seed, results):
+    rng = random.Random(seed)
+    stats = {'reads': 0, 'writes': 0, 'errors': 0, 'latencies': []}
+    connection = connections[alias]
+    try:
+        while time.perf_counter() < deadline:
+            write = rng.random() < write_ratio
+            started = time.perf_counter()
+            try:
+                (write_post if write else read_feed)(alias, author_id)
+            except OperationalError:
+                # «database is locked» и прочие отказы SQLite.
+                stats['errors'] += 1
+            else:
+                stats['writes' if write else 'reads'] += 1
+                stats['latencies'].append(
+                    (time.perf_counter() - started) * 1000
+                )
+            # Конец «запроса»: то же, что делает Django по request_finished.
+            connection.close_if_unusable_or_obsolete()
+    finally:
+        connection.close()
+    results.append(stats)
+
+
+def run_profile(alias, threads, seconds, write_ratio, author_id):
+    results = []
+    deadline = time.perf_counter() + seconds
+    pool = [
+        threading.Thread(
+            target=worker,
+            args=(alias, author_id, deadline, write_ratio, seed, results)
+        )
+        for seed in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    latencies = [ms for stats in results for ms in stats['latencies']]
+    reads = sum(stats['reads'] for stats in results)
+    writes = sum(stats['writes'] for stats in results)
+    return {
+        'reads_per_s': round(reads / seconds, 1),
+        'writes_per_s': round(writes / seconds, 1),
+        'errors': sum(stats['errors'] for stats in results),
+        'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 3) if latencies else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Многопоточная нагрузка чтением ленты и записью постов на копиях '
+        'базы с разными профилями SQLite; показывает пропускную '
+        'способность и число отказов «database is locked»'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля операций записи, от 0 до 1'
+        )
+        parser.add_argument(
+            '--profiles', nargs='+', choices=sorted(PROFILES),
+            default=list(PROFILES)
+        )
+        parser.add_argument('--output', help='Файл для результатов')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite' or primary.is_in_memory_db():
+            raise CommandError('Нужна SQLite-база в файле')
+        if not 0 <= options['write_ratio'] <= 1:
+            raise CommandError('--write-ratio должен быть от 0 до 1')
+        author = User.objects.order_by('pk').first()
+        if author is None:
+            raise CommandError('База пуста: сначала запустите seed_data')
+        AuthorStats.objects.get_or_create(author=author)
+
+        directory = tempfile.mkdtemp()
+        results = {
+            'meta': {
+                'threads': options['threads'],
+                'seconds': options['seconds'],
+                'write_ratio': options['write_ratio'],
+                'posts': Post.objects.count(),
+            }
+        }
+        primary.ensure_connection()
+        try:
+            for name in options['profiles']:
+                alias = f'bench_{name}'
+                path = os.path.join(directory, f'{name}.sqlite3')
+                # Каждый профиль работает на своей копии базы.
+                copy_database(primary.connection, path)
+                with temporary_database(
+                    alias, {**PROFILES[name], 'NAME': path}
+                ):
+                    results[name] = run_profile(
+                        alias, options['threads'], options['seconds'],
+                        options['write_ratio'], author.pk
+                    )
+                self.stdout.write(
+                    f'{name:<12} чтений/с {results[name]["reads_per_s"]:>9}  '
+                    f'записей/с {results[name]["writes_per_s"]:>8}  '
+                    f'отказов {results[name]["errors"]:>6}  '
+                    f'p95 {results[name]["p95_ms"]} мс'
+                )
+        finally:
+            shutil.rmtree(directory)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import mark_synced
+
+
+def copy_database(source, path):
+    """Копирует базу через backup API во временный файл и подменяет им
+    реплику: читатели видят либо старую копию, либо новую целиком."""
+    temporary = f'{path}.sync'
+    target = sqlite3.connect(temporary)
+    try:
+        source.backup(target)
+        # Режим WAL записан в заголовке базы и переехал бы в копию;
+        # реплике, которую подменяют целиком, нужен обычный журнал.
+        target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+    os.replace(temporary, path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет SQLite-реплики из DATABASE_REPLICAS копией основной '
+        'базы. С --interval работает, пока его не остановят'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять синхронизацию каждые N секунд'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте DJANGO_READ_REPLICAS'
+            )
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копировать можно только SQLite-базу')
+        try:
+            while True:
+                self.sync(primary)
+                if options['interval'] is None:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def sync(self, primary):
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            # Всё, что закоммичено до начала копирования, в реплику попадёт.
+            started = time.time()
+            copy_database(
+                primary.connection, connections[alias].settings_dict['NAME']
+            )
+            connections[alias].close()
+            mark_synced(alias, started)
+            self.stdout.write(
+                f'{alias}: {time.time() - started:.2f} с'
+            )
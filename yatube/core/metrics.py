@@ -0,0 +1,199 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Сборщик замеров текущего запроса; вне запроса — None.
+current_metrics = ContextVar('current_metrics', default=None)
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestMetrics:
+    """Замеры одного запроса. Экземпляр сам служит execute_wrapper
+    для соединений с базой."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        # Имя шаблона -> [число рендеров, собственное время без
+        # вложенных include и extends].
+        self.templates = {}
+        self._nested = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def template_started(self):
+        self._nested.append(0.0)
+
+    def template_finished(self, name, elapsed):
+        own = elapsed - self._nested.pop()
+        if self._nested:
+            self._nested[-1] += elapsed
+        stats = self.templates.setdefault(name, [0, 0.0])
+        stats[0] += 1
+        stats[1] += own
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total_time):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} SQL"',
+            f'tpl;dur={self.template_time * 1000:.2f}',
+            f'total;dur={total_time * 1000:.2f}',
+        ))
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class Counter:
+    """Счётчик Prometheus с одной меткой."""
+
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def inc(self, key, amount=1):
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} counter',
+        ]
+        with self.lock:
+            snapshot = dict(self.series)
+        for key in sorted(snapshot):
+            lines.append(
+                f'{self.name}{{{self.label}="{escape_label(key)}"}} '
+                f'{snapshot[key]}'
+            )
+        return lines
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками по имени вью.
+
+    На горячем пути — один bisect и инкремент под общим замком;
+    накопленные суммы по корзинам считаются только при выгрузке.
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, view, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(view)
+            if series is None:
+                series = self.series[view] = [
+                    [0] * (len(self.buckets) + 1), 0.0
+                ]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self.lock:
+            snapshot = {
+                view: (list(counts), total)
+                for view, (counts, total) in self.series.items()
+            }
+        for view in sorted(snapshot):
+            counts, total = snapshot[view]
+            label = escape_label(view)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{view="{label}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'yatube_request_duration_seconds',
+    'Полное время обработки запроса',
+    SECONDS_BUCKETS
+)
+DB_DURATION = Histogram(
+    'yatube_db_duration_seconds',
+    'Время SQL-запросов за один HTTP-запрос',
+    SECONDS_BUCKETS
+)
+TEMPLATE_DURATION = Histogram(
+    'yatube_template_duration_seconds',
+    'Время рендера шаблонов за один HTTP-запрос',
+    SECONDS_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'yatube_db_queries',
+    'Число SQL-запросов за один HTTP-запрос',
+    QUERIES_BUCKETS
+)
+HISTOGRAMS = (REQUEST_DURATION, DB_DURATION, TEMPLATE_DURATION, DB_QUERIES)
+TEMPLATE_RENDERS = Counter(
+    'yatube_template_renders_total',
+    'Сколько раз отрендерен шаблон, включая include',
+    'template'
+)
+TEMPLATE_SECONDS = Counter(
+    'yatube_template_render_seconds_total',
+    'Собственное время рендера шаблона без вложенных шаблонов',
+    'template'
+)
+COUNTERS = (TEMPLATE_RENDERS, TEMPLATE_SECONDS)
+
+
+def record(view, metrics, total_time):
+    REQUEST_DURATION.observe(view, total_time)
+    DB_DURATION.observe(view, metrics.db_time)
+    TEMPLATE_DURATION.observe(view, metrics.template_time)
+    DB_QUERIES.observe(view, metrics.queries)
+    for name, (count, seconds) in metrics.templates.items():
+        TEMPLATE_RENDERS.inc(name, count)
+        TEMPLATE_SECONDS.inc(name, seconds)
+
+
+def render_prometheus():
+    lines = []
+    for metric in HISTOGRAMS + COUNTERS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,88 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import RequestMetrics, current_metrics, record
+from .routers import current_replicas, fresh_replicas, request_writes
+
+UNRESOLVED = '<unresolved>'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'primary_pin'
+
+
+class MetricsMiddleware:
+    """Замеряет SQL, рендер шаблонов и полное время запроса.
+
+    Итог отдаётся в заголовке Server-Timing и попадает в гистограммы
+    по имени вью (`posts:index`), которые выгружает core.views.metrics.
+    Стоит первым в MIDDLEWARE, чтобы учитывать и остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total_time = metrics.total_time
+        match = getattr(request, 'resolver_match', None)
+        record(match.view_name if match else UNRESOLVED, metrics, total_time)
+        response['Server-Timing'] = metrics.server_timing(total_time)
+        return response
+
+
+class ReplicaMiddleware:
+    """Разрешает вью из REPLICA_VIEW_MODULES читать с реплик.
+
+    После записи в реплицируемые модели (каким бы методом ни пришёл
+    запрос) пользователь получает куку со временем записи и на
+    REPLICA_PIN_SECONDS остаётся на тех репликах, что синхронизированы
+    позже неё, а если таких нет — на основной базе. Поэтому после
+    post_create профиль всегда показывает новый пост, а после подписки —
+    кнопку «Отписаться».
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._replicas_token = None
+        writes = []
+        writes_token = request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_writes.reset(writes_token)
+            if request._replicas_token is not None:
+                current_replicas.reset(request._replicas_token)
+        if writes and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, f'{time.time():.6f}',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            or view_func.__module__ not in settings.REPLICA_VIEW_MODULES
+        ):
+            return None
+        try:
+            written_at = float(request.COOKIES[PIN_COOKIE])
+        except (KeyError, ValueError):
+            written_at = None
+        request._replicas_token = current_replicas.set(
+            fresh_replicas(written_at)
+        )
+        return None
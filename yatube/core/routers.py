@@ -0,0 +1,89 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+# Реплики, из которых можно читать в текущем запросе, и моменты их
+# синхронизации. Заполняет ReplicaMiddleware; вне запроса (команды,
+# фоновые задачи) пусто, и всё читается с основной базы.
+current_replicas = ContextVar('current_replicas', default={})
+# Модели, которые текущий запрос успел записать. ReplicaMiddleware
+# ставит куку-пин по этому списку, а не по методу запроса: подписка
+# на автора, например, пишет в базу на GET.
+request_writes = ContextVar('request_writes', default=None)
+
+SYNCED_KEY = 'db:replica:synced:{}'
+# Приложения, чтение моделей которых можно отдать реплике. Сессии
+# и прочее, от чего зависит вход, всегда читаются с основной базы.
+REPLICA_APP_LABELS = {'posts', 'auth'}
+
+
+def mark_synced(alias, timestamp):
+    """Запоминает, по какой момент реплика содержит данные основной."""
+    caches['shared'].set(SYNCED_KEY.format(alias), timestamp, None)
+
+
+def fresh_replicas(written_at=None):
+    """Реплики, которые отстают не больше REPLICA_MAX_LAG и уже
+    содержат последнюю запись пользователя (written_at), с моментами
+    их синхронизации."""
+    aliases = settings.DATABASE_REPLICAS
+    if not aliases:
+        return {}
+    synced = caches['shared'].get_many(
+        [SYNCED_KEY.format(alias) for alias in aliases]
+    )
+    threshold = time.time() - settings.REPLICA_MAX_LAG
+    if written_at is not None:
+        threshold = max(threshold, written_at)
+    fresh = {}
+    for alias in aliases:
+        synced_at = synced.get(SYNCED_KEY.format(alias), 0)
+        if synced_at >= threshold:
+            fresh[alias] = synced_at
+    return fresh
+
+
+def snapshot_time():
+    """Момент, по который прочитанные в запросе данные точно свежие.
+
+    С репликами это время самой старой синхронизации: кэш страниц
+    сравнивает его с версиями тегов и не сохраняет страницу, собранную
+    до того, как реплика получила сброшенные изменения.
+    """
+    return min([time.time(), *current_replicas.get().values()])
+
+
+class ReplicaRouter:
+    """Чтения из вью лент уходят на реплики, запись — на основную базу.
+
+    После первой записи запрос до конца читает с основной базы: вью,
+    которая пишет, должна видеть и свою запись, и всё, что было до неё.
+    Схема на реплики не накатывается: они целиком копируются с основной
+    базы командой sync_replicas.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = current_replicas.get()
+        if replicas and model._meta.app_label in REPLICA_APP_LABELS:
+            return random.choice(list(replicas))
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in REPLICA_APP_LABELS:
+            writes = request_writes.get()
+            if writes is not None:
+                writes.append(model._meta.label)
+            if current_replicas.get():
+                current_replicas.set({})
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все базы — копии одной, связи между их объектами допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
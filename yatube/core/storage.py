@@ -0,0 +1,38 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.xml')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хэшами в именах плюс рядом с каждым текстовым файлом
+    его gzip-версия `<имя>.gz`, если она получилась меньше оригинала.
+
+    Сжатие делается один раз в collectstatic, отдаёт их
+    core.views.static_file.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE):
+                compressed = self.compress(name)
+                if compressed:
+                    yield name, compressed, True
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        # mtime=0: одинаковые файлы дают одинаковый архив при каждой сборке.
+        packed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(packed) >= len(content):
+            return None
+        compressed_name = f'{name}.gz'
+        if self.exists(compressed_name):
+            self.delete(compressed_name)
+        self._save(compressed_name, ContentFile(packed))
+        return compressed_name
@@ -0,0 +1,87 @@
+import logging
+import os
+import time
+
+from django.template import TemplateDoesNotExist, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.base import Template
+from django.template.loaders import cached
+from django.template.loaders.base import Loader as BaseLoader
+
+from .metrics import current_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ProfiledTemplate(Template):
+    """Шаблон, который учитывает каждый свой рендер, в том числе через
+    {% include %} и {% extends %}, в замерах текущего запроса."""
+
+    def _render(self, context):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super()._render(context)
+        metrics.template_started()
+        started = time.perf_counter()
+        try:
+            return super()._render(context)
+        finally:
+            metrics.template_finished(
+                self.origin.template_name or '<string>',
+                time.perf_counter() - started
+            )
+
+
+class ProfilingLoader(BaseLoader):
+    def get_template(self, template_name, skip=None):
+        tried = []
+        for origin in self.get_template_sources(template_name):
+            if skip is not None and origin in skip:
+                tried.append((origin, 'Skipped'))
+                continue
+            try:
+                contents = self.get_contents(origin)
+            except TemplateDoesNotExist:
+                tried.append((origin, 'Source does not exist'))
+                continue
+            return ProfiledTemplate(
+                contents, origin, origin.template_name, self.engine
+            )
+        raise TemplateDoesNotExist(template_name, tried=tried)
+
+
+class Loader(cached.Loader, ProfilingLoader):
+    """Обёртка над загрузчиками, как у cached.Loader, которая выдаёт
+    ProfiledTemplate. С use_cache=False (для разработки) шаблоны
+    читаются с диска заново при каждом обращении."""
+
+    def __init__(self, engine, loaders, use_cache=True):
+        super().__init__(engine, loaders)
+        self.use_cache = use_cache
+
+    def get_template(self, template_name, skip=None):
+        if self.use_cache:
+            return super().get_template(template_name, skip)
+        return ProfilingLoader.get_template(self, template_name, skip)
+
+
+def warm_up():
+    """Компилирует все шаблоны из каталогов DIRS, чтобы первые запросы
+    после старта воркера не тратили время на разбор."""
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        for directory in engine.dirs:
+            for root, _, files in os.walk(directory):
+                for file_name in files:
+                    if not file_name.endswith('.html'):
+                        continue
+                    name = os.path.relpath(
+                        os.path.join(root, file_name), directory
+                    ).replace(os.sep, '/')
+                    engine.get_template(name)
+                    compiled += 1
+    logger.info('Скомпилировано шаблонов: %s', compiled)
+    return compiled
@@ -0,0 +1,152 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+
+def _walk(patterns, namespace, params):
+    for pattern in patterns:
+        names = params | set(pattern.pattern.regex.groupindex)
+        if isinstance(pattern, URLResolver):
+            inner = namespace
+            if pattern.namespace:
+                inner = f'{namespace}{pattern.namespace}:'
+            yield from _walk(pattern.url_patterns, inner, names)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}{pattern.name}', names
+
+
+def named_urls(values, namespaces=None, exclude_namespaces=()):
+    """Адреса всех именованных маршрутов проекта.
+
+    Параметры маршрутов берутся из словаря values; маршруты, для которых
+    значений не хватило, возвращаются отдельным списком. Если несколько
+    имён ведут на один адрес (как users:login и login из
+    django.contrib.auth.urls), остаётся первое.
+    """
+    urls, skipped, paths = {}, [], set()
+    for name, params in _walk(get_resolver().url_patterns, '', set()):
+        namespace = name.rpartition(':')[0].split(':')[0]
+        if namespaces is not None and namespace not in namespaces:
+            continue
+        if namespace in exclude_namespaces:
+            continue
+        kwargs = {param: values.get(param) for param in params}
+        if None in kwargs.values():
+            skipped.append(name)
+            continue
+        path = reverse(name, kwargs=kwargs)
+        if path not in paths:
+            paths.add(path)
+            urls[name] = path
+    return urls, skipped
+
+
+def fetch(client, url):
+    """GET с чтением потокового ответа: запросы, которые делает
+    генератор выгрузки, тоже должны попасть в замер."""
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+    return [query['sql'] for query in captured]
+
+
+def format_queries(queries):
+    return '\n'.join(
+        f'{number}. {sql}' for number, sql in enumerate(queries, 1)
+    )
+
+
+class QueryBudgetMixin:
+    """Проверка числа SQL-запросов на всех именованных адресах.
+
+    Подкласс TestCase объявляет:
+    - `query_budgets`: имя маршрута -> (бюджет гостя, бюджет
+      авторизованного); None вместо бюджета — режим не проверяется;
+    - `url_kwargs()`: значения параметров маршрутов;
+    - `add_data(size)`: наполнение базы, вызывается для каждого
+      размера из `data_sizes`;
+    - `login_user`: от чьего имени ходит авторизованный клиент;
+    - `auth_queries`: запросы авторизации сверх бюджета страницы.
+
+    Тест падает, если у маршрута нет бюджета, если запросов больше
+    бюджета (с `exact_budgets` — не ровно столько) или если их число
+    меняется вместе с размером данных; в сообщении приводится SQL.
+    """
+
+    query_budgets = {}
+    exclude_namespaces = ('admin',)
+    data_sizes = (25, 50)
+    exact_budgets = False
+    # Сколько запросов добавляет авторизация: сессия и пользователь
+    # берутся из кэша (SESSION_ENGINE cached_db, users.cache).
+    auth_queries = 0
+    login_user = None
+    remote_addr = '192.0.2.1'
+
+    def url_kwargs(self):
+        return {}
+
+    def add_data(self, size):
+        """По умолчанию база не наполняется: каждый размер из
+        `data_sizes` меряется на данных из setUpClass."""
+
+    def check_budget(self, name, mode, queries, budget):
+        ok = (
+            len(queries) == budget if self.exact_budgets
+            else len(queries) <= budget
+        )
+        if not ok:
+            self.fail(
+                f'{name} ({mode}): {len(queries)} запросов при бюджете '
+                f'{budget}:\n{format_queries(queries)}'
+            )
+
+    def test_query_budgets(self):
+        # Клиенты ходят не с INTERNAL_IPS, как обычные посетители.
+        clients = {
+            'guest': Client(REMOTE_ADDR=self.remote_addr),
+            'authorized': Client(REMOTE_ADDR=self.remote_addr),
+        }
+        clients['authorized'].force_login(self.login_user)
+        urls, skipped = named_urls(
+            self.url_kwargs(), exclude_namespaces=self.exclude_namespaces
+        )
+        self.assertEqual(skipped, [], 'Нет значений параметров маршрутов')
+        # Вход меняет last_login, и пользователь выпадает из кэша:
+        # первый запрос после входа перечитывает его из базы.
+        fetch(clients['authorized'], next(iter(urls.values())))
+        self.assertEqual(
+            set(urls), set(self.query_budgets),
+            'У каждого маршрута должен быть бюджет запросов'
+        )
+        first_run = {}
+        for size in self.data_sizes:
+            self.add_data(size)
+            # bulk_create не шлёт сигналов, поэтому кэш чистим сами.
+            cache.clear()
+            for name, url in urls.items():
+                budgets = dict(zip(clients, self.query_budgets[name]))
+                if budgets['authorized'] is not None:
+                    budgets['authorized'] += self.auth_queries
+                for mode, client in clients.items():
+                    if budgets[mode] is None:
+                        continue
+                    if mode == 'guest':
+                        # Гость всегда приходит без сессии: её могла
+                        # завести предыдущая страница.
+                        client.cookies.clear()
+                    with self.subTest(name=name, mode=mode, size=size):
+                        queries = fetch(client, url)
+                        self.check_budget(name, mode, queries, budgets[mode])
+                        previous = first_run.setdefault((name, mode), queries)
+                        if len(previous) != len(queries):
+                            self.fail(
+                                f'{name} ({mode}): число запросов зависит '
+                                f'от объёма данных, было:\n'
+                                f'{format_queries(previous)}\nстало:\n'
+                                f'{format_queries(queries)}'
+                            )
@@ -0,0 +1,109 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Engine
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.metrics import COUNTERS, HISTOGRAMS
+from core.template_loaders import ProfiledTemplate, warm_up
+from posts.models import Post
+
+User = get_user_model()
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for metric in HISTOGRAMS + COUNTERS:
+            metric.clear()
+
+    def test_server_timing_header(self):
+        '''Проверяем, что ответ несёт замеры SQL, шаблонов и общего
+        времени'''
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ SQL"')
+        self.assertRegex(timing, r'tpl;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+        template_time = float(re.search(r'tpl;dur=([\d.]+)', timing)[1])
+        self.assertGreater(template_time, 0)
+
+    def test_histograms_by_view_name(self):
+        '''Проверяем выгрузку гистограмм по имени вью и доступ к ней'''
+        for _ in range(2):
+            self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:tech'))
+        self.client.get('/no-such-page/')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text
+        )
+        self.assertIn(
+            'yatube_db_queries_bucket{view="about:tech",le="0"} 1', text
+        )
+        self.assertIn('view="<unresolved>"', text)
+
+        outsider = Client(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(outsider.get(reverse('metrics')).status_code, 403)
+        staff = User.objects.create_user(username='admin', is_staff=True)
+        outsider.force_login(staff)
+        self.assertEqual(outsider.get(reverse('metrics')).status_code, 200)
+
+
+class TemplateProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for metric in HISTOGRAMS + COUNTERS:
+            metric.clear()
+
+    def test_renders_counted_per_template(self):
+        '''Проверяем, что учитывается каждый шаблон, включая
+        include в цикле по постам и базовый шаблон'''
+        author = User.objects.create_user(username='hanson')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {i}') for i in range(3)
+        )
+        self.client.get(reverse('posts:index'))
+        text = self.client.get(reverse('metrics')).content.decode()
+        for template, count in (
+            ('posts/index.html', 1),
+            ('base.html', 1),
+            ('includes/article.html', 3),
+        ):
+            with self.subTest(template=template):
+                self.assertIn(
+                    'yatube_template_renders_total'
+                    f'{{template="{template}"}} {count}',
+                    text
+                )
+        self.assertIn(
+            'yatube_template_render_seconds_total'
+            '{template="includes/article.html"}',
+            text
+        )
+
+    def test_cached_loader_and_warm_up(self):
+        '''Проверяем, что загрузчик отдаёт профилируемые шаблоны
+        и с кэшем компилирует каждый один раз'''
+        default = Engine.get_default()
+        loaders = ['django.template.loaders.filesystem.Loader']
+        for use_cache in (True, False):
+            engine = Engine(
+                dirs=default.dirs,
+                libraries=default.libraries,
+                loaders=[
+                    ('core.template_loaders.Loader', loaders, use_cache)
+                ],
+            )
+            with self.subTest(use_cache=use_cache):
+                first = engine.get_template('base.html')
+                self.assertIsInstance(first, ProfiledTemplate)
+                self.assertEqual(
+                    first is engine.get_template('base.html'), use_cache
+                )
+        self.assertGreater(warm_up(), 0)
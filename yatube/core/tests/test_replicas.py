@@ -0,0 +1,146 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.management.commands.sync_replicas import copy_database
+from core.middleware import PIN_COOKIE, ReplicaMiddleware
+from core.routers import (
+    ReplicaRouter,
+    current_replicas,
+    fresh_replicas,
+    mark_synced,
+    request_writes,
+    snapshot_time
+)
+from posts import views
+from posts.models import Post
+from users import views as users_views
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_MAX_LAG=300)
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.middleware = ReplicaMiddleware(lambda request: HttpResponse())
+
+    def replicas_for(self, view, cookies=None):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        request._replicas_token = None
+        self.middleware.process_view(request, view, (), {})
+        replicas = current_replicas.get()
+        if request._replicas_token is not None:
+            current_replicas.reset(request._replicas_token)
+        return replicas
+
+    def test_router_sends_feed_reads_to_replica(self):
+        '''Проверяем, что реплика получает только чтение моделей лент'''
+        router = ReplicaRouter()
+        token = current_replicas.set({'replica1': time.time()})
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica1')
+            self.assertEqual(router.db_for_read(User), 'replica1')
+            self.assertIsNone(router.db_for_read(Session))
+            self.assertEqual(router.db_for_write(Post), 'default')
+        finally:
+            current_replicas.reset(token)
+        self.assertIsNone(router.db_for_read(Post))
+
+    def test_reads_after_write_go_to_primary(self):
+        '''Проверяем, что после записи запрос читает с основной базы
+        и отмечает, что писал'''
+        router = ReplicaRouter()
+        writes = []
+        writes_token = request_writes.set(writes)
+        token = current_replicas.set({'replica1': time.time()})
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica1')
+            router.db_for_write(Post)
+            self.assertIsNone(router.db_for_read(Post))
+        finally:
+            current_replicas.reset(token)
+            request_writes.reset(writes_token)
+        self.assertEqual(writes, ['posts.Post'])
+
+    def test_get_that_writes_pins_user(self):
+        '''Проверяем, что подписка на GET тоже закрепляет
+        пользователя за основной базой'''
+        author = User.objects.create_user(username='tom')
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'tom'})
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': author.username})
+        )
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_user_pinned_to_primary_until_replica_has_their_write(self):
+        '''Проверяем, что после записи пользователь читает с реплики,
+        только когда её синхронизировали позже записи'''
+        self.assertEqual(self.replicas_for(views.index), {})
+        synced_at = time.time()
+        mark_synced('replica1', synced_at)
+        self.assertEqual(
+            self.replicas_for(views.index), {'replica1': synced_at}
+        )
+        self.assertEqual(self.replicas_for(users_views.SignUp.as_view()), {})
+
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        written_at = float(response.cookies[PIN_COOKIE].value)
+        self.assertGreater(written_at, synced_at)
+        cookies = {PIN_COOKIE: str(written_at)}
+        self.assertEqual(self.replicas_for(views.profile, cookies), {})
+        mark_synced('replica1', written_at + 1)
+        self.assertIn('replica1', self.replicas_for(views.profile, cookies))
+
+    def test_lagging_replica_is_skipped(self):
+        '''Проверяем, что отставшая реплика не используется, а кэш
+        страниц считает данные свежими лишь на момент синхронизации'''
+        mark_synced('replica1', time.time() - 1000)
+        self.assertEqual(fresh_replicas(), {})
+        token = current_replicas.set({'replica1': 100.0})
+        try:
+            self.assertEqual(snapshot_time(), 100.0)
+        finally:
+            current_replicas.reset(token)
+
+    def test_copy_database_replaces_replica_file(self):
+        '''Проверяем, что синхронизация подменяет файл реплики копией'''
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        source = sqlite3.connect(os.path.join(directory, 'primary.sqlite3'))
+        source.execute('CREATE TABLE post (text TEXT)')
+        source.execute("INSERT INTO post VALUES ('Текст')")
+        source.commit()
+        path = os.path.join(directory, 'replica.sqlite3')
+        copy_database(source, path)
+        source.close()
+        replica = sqlite3.connect(path)
+        self.assertEqual(
+            replica.execute('SELECT text FROM post').fetchall(), [('Текст',)]
+        )
+        replica.close()
+        self.assertNotIn('replica.sqlite3.sync', os.listdir(directory))
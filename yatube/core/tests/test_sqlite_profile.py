@@ -0,0 +1,82 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.management.commands.bench_db import (
+    PROFILES,
+    run_profile,
+    temporary_database
+)
+from core.management.commands.sync_replicas import copy_database
+
+User = get_user_model()
+
+
+class SQLiteProfileTests(TransactionTestCase):
+    # Копия тестовой базы снимается backup API, которому мешала бы
+    # незакрытая транзакция TestCase.
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+
+    def add_alias(self, profile):
+        alias = f'test_{profile}'
+        database = temporary_database(
+            alias, {**PROFILES[profile], 'NAME': self.path}
+        )
+        database.__enter__()
+        self.addCleanup(database.__exit__, None, None, None)
+        return alias
+
+    def test_pragmas_and_immediate_transactions(self):
+        '''Проверяем прагмы на новом соединении и BEGIN IMMEDIATE
+        в начале atomic()'''
+        connection = connections[self.add_alias('production')]
+        with connection.cursor() as cursor:
+            for pragma, expected in (
+                ('journal_mode', 'wal'),
+                ('synchronous', 1),
+                ('busy_timeout', 5000),
+                ('mmap_size', 256 * 1024 * 1024),
+            ):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], expected, pragma)
+        with CaptureQueriesContext(connection) as captured:
+            with transaction.atomic(using=connection.alias):
+                pass
+        self.assertEqual(captured[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_persistent_connection_dropped_when_file_replaced(self):
+        '''Проверяем, что долгоживущее соединение закрывается, если файл
+        базы подменили'''
+        connection = connections[self.add_alias('production')]
+        connection.ensure_connection()
+        connection.close_if_unusable_or_obsolete()
+        self.assertIsNotNone(connection.connection)
+
+        other = os.path.join(self.directory, 'other.sqlite3')
+        sqlite3.connect(other).close()
+        os.replace(other, self.path)
+        connection.close_if_unusable_or_obsolete()
+        self.assertIsNone(connection.connection)
+
+    def test_benchmark_workload_runs_without_lock_errors(self):
+        '''Проверяем, что под профилем production параллельные чтение
+        и запись проходят без «database is locked»'''
+        author = User.objects.create_user(username='hanson')
+        connections['default'].ensure_connection()
+        copy_database(connections['default'].connection, self.path)
+        result = run_profile(
+            self.add_alias('production'), threads=4, seconds=0.5,
+            write_ratio=0.5, author_id=author.pk
+        )
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['writes_per_s'], 0)
+        self.assertGreater(result['reads_per_s'], 0)
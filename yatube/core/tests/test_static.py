@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root, STATICFILES_STORAGE=STORAGE
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.static_root, 'staticfiles.json')) as f:
+            cls.manifest = json.load(f)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def static_url(self, name):
+        return f'{settings.STATIC_URL}{name}'
+
+    def test_collectstatic_hashes_and_compresses(self):
+        '''Проверяем хэши в именах, gzip-версии текстовых файлов
+        и хэшированные адреса в шаблонах'''
+        css = self.manifest['css/bootstrap.min.css']
+        self.assertRegex(css, r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.static_root, css), 'rb') as f:
+            original = f.read()
+        with gzip.open(os.path.join(self.static_root, css + '.gz')) as f:
+            self.assertEqual(f.read(), original)
+        png = self.manifest['img/logo.png']
+        self.assertFalse(
+            os.path.exists(os.path.join(self.static_root, png + '.gz'))
+        )
+        with self.settings(DEBUG=False):
+            response = self.client.get('/about/tech/')
+        self.assertContains(response, self.static_url(css))
+        self.assertContains(
+            response, self.static_url(self.manifest['img/fav/favicon.ico'])
+        )
+
+    def test_static_view_negotiates_encoding_and_caching(self):
+        '''Проверяем выбор gzip по Accept-Encoding и заголовки кэша'''
+        url = self.static_url(self.manifest['css/bootstrap.min.css'])
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['Content-Type'], 'text/css')
+
+        for accept in ('', 'gzip;q=0, identity'):
+            with self.subTest(accept=accept):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+        plain = self.static_url('css/bootstrap.min.css')
+        response = self.client.get(plain)
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = self.client.get(
+            plain, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            self.client.get(self.static_url('../manage.py')).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(self.static_url('css/missing.css')).status_code,
+            404
+        )
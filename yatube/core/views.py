@@ -0,0 +1,94 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified
+)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .metrics import render_prometheus
+from .storage import COMPRESSIBLE
+
+# Имя, в которое ManifestStaticFilesStorage вписал хэш содержимого:
+# такой файл по этому адресу уже никогда не изменится.
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def metrics(request):
+    """Гистограммы запросов в текстовом формате Prometheus; доступны
+    с адресов из INTERNAL_IPS и сотрудникам."""
+    if (
+        request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS
+        and not request.user.is_staff
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        render_prometheus(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def accepts_gzip(request):
+    """Разрешает ли клиент gzip: `gzip;q=0` — явный отказ."""
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            quality = params.strip().replace(' ', '')
+            return quality not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def static_file(request, path):
+    """Отдаёт файлы из STATIC_ROOT после collectstatic.
+
+    Файлы с хэшем в имени кэшируются браузером навсегда, остальные
+    перепроверяются по Last-Modified. Если рядом лежит `.gz` и клиент
+    принимает gzip, отдаётся сжатая версия.
+    """
+    if not settings.STATIC_ROOT:
+        raise Http404('STATIC_ROOT не задан')
+    # Путь за пределы STATIC_ROOT safe_join отклоняет ответом 400.
+    full_path = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404('Нет такого файла')
+
+    compressible = path.endswith(COMPRESSIBLE)
+    serve_path, encoding = full_path, None
+    if compressible and accepts_gzip(request):
+        if os.path.isfile(f'{full_path}.gz'):
+            serve_path, encoding = f'{full_path}.gz', 'gzip'
+
+    stat = os.stat(serve_path)
+    if not HASHED_NAME.search(path) and not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime, stat.st_size
+    ):
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(full_path)[0]
+        response = FileResponse(
+            open(serve_path, 'rb'),
+            content_type=content_type or 'application/octet-stream'
+        )
+        response['Content-Length'] = stat.st_size
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_NAME.search(path):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    if compressible:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,39 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .queue import enqueue_many
+
+SEND_EMAIL = 'send_email'
+
+
+def message_to_payload(message):
+    """Параметры письма для JSON; вложения очередь не переносит."""
+    if message.attachments:
+        raise ValueError('Письма с вложениями не ставятся в очередь')
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+    }
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Вместо отправки ставит письма в очередь задач.
+
+    Запрос (например, сброс пароля) не ждёт почтовый сервер: письма
+    уходят из команды run_jobs через JOBS_EMAIL_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        payloads = [
+            message_to_payload(message)
+            for message in email_messages if message.recipients()
+        ]
+        if payloads:
+            enqueue_many(SEND_EMAIL, payloads)
+        return len(payloads)
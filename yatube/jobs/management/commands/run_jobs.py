@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import BATCH_SIZE, run_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задачи из очереди пачками: письма, уведомления. '
+        'Без --once работает, пока его не остановят'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и выйти'
+        )
+
+    def handle(self, *args, **options):
+        total_done = total_failed = 0
+        try:
+            while True:
+                done, failed = run_batch(options['batch_size'])
+                total_done += done
+                total_failed += failed
+                if done or failed:
+                    self.stdout.write(
+                        f'Выполнено {done}, с ошибкой {failed}'
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего выполнено {total_done}, с ошибкой {total_failed}'
+        ))
@@ -0,0 +1,174 @@
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Имя задачи -> (обработчик, принимает ли он сразу пачку параметров).
+REGISTRY = {}
+BATCH_SIZE = 50
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def task(name, batch=False):
+    """Регистрирует обработчик задачи.
+
+    Обычный обработчик вызывается с параметрами одной задачи как
+    именованными аргументами. Обработчик с batch=True получает список
+    параметров всех задач с этим именем из взятой пачки (так письма
+    отправляются через одно соединение с почтовым сервером) и
+    возвращает по ошибке на каждый: None, если задача выполнена.
+    Исключение из него считается ошибкой всех задач пачки.
+    """
+    def register(handler):
+        REGISTRY[name] = (handler, batch)
+        return handler
+    return register
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=None):
+    """Ставит задачу в очередь; выполнит её команда run_jobs."""
+    if name not in REGISTRY:
+        raise UnknownTask(name)
+    return Job.objects.create(
+        **_job_fields(name, payload, delay, max_attempts)
+    )
+
+
+def enqueue_many(name, payloads, delay=None, max_attempts=None):
+    if name not in REGISTRY:
+        raise UnknownTask(name)
+    return Job.objects.bulk_create(
+        Job(**_job_fields(name, payload, delay, max_attempts))
+        for payload in payloads
+    )
+
+
+def _job_fields(name, payload, delay, max_attempts):
+    fields = {
+        'name': name,
+        'payload': json.dumps(payload or {}, ensure_ascii=False),
+        'run_at': timezone.now() + (delay or timedelta()),
+    }
+    if max_attempts is not None:
+        fields['max_attempts'] = max_attempts
+    return fields
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед повтором: 30 с, 1 мин, 2 мин..."""
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(batch_size=BATCH_SIZE):
+    """Забирает пачку созревших задач и помечает их своими.
+
+    Задачи, зависшие в работе дольше JOBS_LOCK_TIMEOUT (обработчик
+    упал вместе с процессом), снова считаются свободными. Пометка
+    ставится условным UPDATE, поэтому два обработчика одну задачу
+    не возьмут и без SELECT ... FOR UPDATE, которого нет в SQLite.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    available = (
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale)
+    )
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            Job.objects.filter(available)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(available, id__in=ids).update(
+            status=Job.RUNNING,
+            locked_by=token,
+            locked_at=now,
+            attempts=F('attempts') + 1
+        )
+    return list(Job.objects.filter(locked_by=token).order_by('name', 'id'))
+
+
+def _finish(jobs, errors):
+    """Удаляет выполненные задачи, упавшие откладывает на повтор или
+    помечает неудачными; возвращает (выполнено, с ошибкой)."""
+    done = [job.pk for job, error in zip(jobs, errors) if error is None]
+    Job.objects.filter(id__in=done).delete()
+    now = timezone.now()
+    failed = []
+    for job, error in zip(jobs, errors):
+        if error is None:
+            continue
+        job.last_error = error
+        job.locked_by = ''
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            logger.error('Задача %s не выполнена: %s', job, error)
+        else:
+            job.status = Job.QUEUED
+            job.run_at = now + retry_delay(job.attempts)
+        failed.append(job)
+    Job.objects.bulk_update(
+        failed, ('status', 'run_at', 'last_error', 'locked_by', 'locked_at')
+    )
+    return len(done), len(failed)
+
+
+def _execute(name, jobs):
+    """Выполняет задачи с одним именем; возвращает ошибку для каждой."""
+    if name not in REGISTRY:
+        return [f'Неизвестная задача {name}'] * len(jobs)
+    handler, batch = REGISTRY[name]
+    payloads = [json.loads(job.payload) for job in jobs]
+    if batch:
+        try:
+            errors = list(handler(payloads))
+        except Exception:
+            return [traceback.format_exc()] * len(jobs)
+        if len(errors) != len(jobs):
+            return [f'{name} вернула {len(errors)} ошибок на '
+                    f'{len(jobs)} задач'] * len(jobs)
+        return errors
+    errors = []
+    for payload in payloads:
+        try:
+            handler(**payload)
+        except Exception:
+            errors.append(traceback.format_exc())
+        else:
+            errors.append(None)
+    return errors
+
+
+def run_batch(batch_size=BATCH_SIZE):
+    """Выполняет одну пачку задач; возвращает (выполнено, с ошибкой).
+
+    Каждая задача завершается или откладывается на повтор сама по себе,
+    в том числе внутри пачечного обработчика: уже отправленное письмо
+    не уйдёт второй раз из-за соседнего, которое не удалось.
+    """
+    done = failed = 0
+    jobs = claim(batch_size)
+    for name, group in groupby(jobs, key=lambda job: job.name):
+        group = list(group)
+        group_done, group_failed = _finish(group, _execute(name, group))
+        done += group_done
+        failed += group_failed
+    return done, failed
@@ -0,0 +1,35 @@
+import traceback
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .backends import SEND_EMAIL
+from .queue import task
+
+
+def payload_to_message(payload):
+    alternatives = payload.pop('alternatives')
+    message = EmailMultiAlternatives(**payload)
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+@task(SEND_EMAIL, batch=True)
+def send_email(payloads):
+    """Отправляет пачку писем через одно соединение, по одному.
+
+    Ошибка письма не мешает остальным: повторяется только оно.
+    Если соединение не открылось, исключение уходит в очередь,
+    и повторяется вся пачка — из неё ничего не отправлено.
+    """
+    errors = []
+    with get_connection(settings.JOBS_EMAIL_BACKEND) as connection:
+        for payload in payloads:
+            try:
+                connection.send_messages([payload_to_message(payload)])
+            except Exception:
+                errors.append(traceback.format_exc())
+            else:
+                errors.append(None)
+    return errors
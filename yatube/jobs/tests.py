@@ -0,0 +1,119 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import REGISTRY, enqueue, run_batch
+
+User = get_user_model()
+
+
+class RejectingEmailBackend(EmailBackend):
+    """Почтовый сервер, который не принимает письма на один адрес."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'broken@example.com' in message.to:
+                raise ConnectionError('Адрес отклонён')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='jobs.backends.QueuedEmailBackend',
+    JOBS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='hanson', email='hanson@example.com',
+            password='old-password'
+        )
+
+    def test_password_reset_email_is_queued(self):
+        '''Проверяем, что сброс пароля только ставит письмо в очередь,
+        а отправляет его run_jobs'''
+        response = Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'hanson@example.com'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.filter(name='send_email').count(), 1)
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['hanson@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
+        self.assertFalse(Job.objects.exists())
+
+    def test_emails_are_sent_in_batches(self):
+        '''Проверяем, что письма уходят пачками не больше batch_size'''
+        for number in range(5):
+            mail.send_mail(
+                f'Письмо {number}', 'Текст', None, ['reader@example.com']
+            )
+        self.assertEqual(run_batch(batch_size=3), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(run_batch(batch_size=3), (2, 0))
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            [f'Письмо {number}' for number in range(5)]
+        )
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        '''Проверяем отложенный повтор упавшей задачи и отметку
+        о неудаче после последней попытки'''
+        handler = mock.Mock(side_effect=[RuntimeError('сбой'), None])
+        with mock.patch.dict(REGISTRY, {'flaky': (handler, False)}):
+            job = enqueue('flaky', {'value': 1}, max_attempts=2)
+            self.assertEqual(run_batch(), (0, 1))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.QUEUED)
+            self.assertEqual(job.attempts, 1)
+            self.assertIn('RuntimeError', job.last_error)
+            self.assertGreater(job.run_at, timezone.now())
+            # До паузы задача не берётся.
+            self.assertEqual(run_batch(), (0, 0))
+
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            self.assertEqual(run_batch(), (1, 0))
+            handler.assert_called_with(value=1)
+
+            handler.side_effect = RuntimeError('снова сбой')
+            job = enqueue('flaky', {'value': 2}, max_attempts=1)
+            with self.assertLogs('jobs.queue', 'ERROR'):
+                self.assertEqual(run_batch(), (0, 1))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.FAILED)
+
+    @override_settings(
+        JOBS_EMAIL_BACKEND='jobs.tests.RejectingEmailBackend'
+    )
+    def test_bad_email_fails_only_its_own_job(self):
+        '''Проверяем, что неотправленное письмо повторяется одно,
+        а уже отправленные из той же пачки не уходят второй раз'''
+        for address in ('first', 'broken', 'last'):
+            mail.send_mail(
+                'Письмо', 'Текст', None, [f'{address}@example.com']
+            )
+        self.assertEqual(run_batch(), (2, 1))
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['first@example.com'], ['last@example.com']]
+        )
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('ConnectionError', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(run_batch(), (0, 1))
+        self.assertEqual(len(mail.outbox), 2)
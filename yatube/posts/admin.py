@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from . import search
+from .models import ArchivedPost, Follow, Group, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,12 +11,37 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_supported():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        if not search.match_expression(search_term):
+            # В запросе одни знаки препинания: FTS5 на пустом MATCH
+            # упал бы, а искать в нём нечего.
+            return queryset.none(), False
+        return queryset.filter(pk__in=search.matching_ids(search_term)), False
+
+
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    search_fields = ('text',)
+    list_filter = ('pub_date',)
+    empty_value_display = '-пусто-'
+
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'slug', 'title', 'description')
+    list_display = ('pk', 'slug', 'title', 'description', 'posts_count')
     search_fields = ('slug', 'title',)
     list_filter = ('title',)
 
 
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    search_fields = ('user__username', 'author__username')
+
+
 admin.site.register(Post, PostAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,141 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from .archive import author_feed, group_feed
+from .cache import cache_for_anonymous, conditional_page
+from .models import ArchivedPost, Group, Post
+from .paginators import KeysetPaginator, make_cursor
+
+User = get_user_model()
+
+# Публичное имя поля и столбец, который для него выбирается.
+FIELDS = {
+    'id': 'id',
+    'pub_date': 'pub_date',
+    'text': 'text',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+# Эти столбцы нужны всегда: по ним строятся курсор и теги кэша.
+KEY_COLUMNS = ('id', 'pub_date', 'author_id', 'group_id')
+PER_PAGE = 10
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def requested_fields(request):
+    """Поля из `?fields=a,b`; без параметра отдаются все."""
+    value = request.GET.get('fields')
+    if not value:
+        return list(FIELDS)
+    fields = [name for name in value.split(',') if name]
+    unknown = set(fields) - set(FIELDS)
+    if unknown or not fields:
+        raise ValueError(
+            'Неизвестные поля: ' + ', '.join(sorted(unknown))
+        )
+    return fields
+
+
+def select_rows(queryset, fields):
+    """Queryset словарей только с нужными столбцами: join к автору
+    и группе добавляется, лишь когда их поля запрошены."""
+    columns = {FIELDS[name] for name in fields}
+    return queryset.values(*KEY_COLUMNS, *columns)
+
+
+def serialize(row, fields):
+    return {name: row[FIELDS[name]] for name in fields}
+
+
+def add_row_tags(request, row):
+    request.cache_tags.update(
+        (f'post:{row["id"]}', f'author:{row["author_id"]}')
+    )
+    if row['group_id'] is not None:
+        request.cache_tags.add(f'group:{row["group_id"]}')
+
+
+def api_response(view):
+    """Разбирает `?fields=` и отдаёт результат вью компактным JSON."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        try:
+            fields = requested_fields(request)
+        except ValueError as error:
+            return JsonResponse(
+                {'error': str(error)}, status=400,
+                json_dumps_params=JSON_PARAMS
+            )
+        return JsonResponse(
+            view(request, fields, *args, **kwargs),
+            json_dumps_params=JSON_PARAMS
+        )
+    return wrapped
+
+
+def feed_data(request, queryset, fields):
+    paginator = KeysetPaginator(select_rows(queryset, fields), PER_PAGE)
+    page = paginator.get_page_from_request(request)
+    rows = page.object_list
+    for row in rows:
+        add_row_tags(request, row)
+    older = newer = None
+    if rows and page.has_older:
+        older = make_cursor(rows[-1]['pub_date'], rows[-1]['id'])
+    if rows and page.has_newer:
+        newer = make_cursor(rows[0]['pub_date'], rows[0]['id'])
+    return {
+        'posts': [serialize(row, fields) for row in rows],
+        'older': older,
+        'newer': newer,
+    }
+
+
+@conditional_page
+@cache_for_anonymous
+@api_response
+def index(request, fields):
+    request.cache_tags.add('feed:index')
+    return feed_data(request, Post.objects.all(), fields)
+
+
+@conditional_page
+@cache_for_anonymous
+@api_response
+def group_posts(request, fields, slug):
+    group = get_object_or_404(Group, slug=slug)
+    request.cache_tags.update((f'group:{group.pk}', f'feed:group:{group.pk}'))
+    return feed_data(request, group_feed(group), fields)
+
+
+@conditional_page
+@cache_for_anonymous
+@api_response
+def profile(request, fields, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    request.cache_tags.update(
+        (f'author:{author.pk}', f'feed:author:{author.pk}')
+    )
+    return feed_data(request, author_feed(author), fields)
+
+
+@conditional_page
+@cache_for_anonymous
+@api_response
+def post_detail(request, fields, post_id):
+    row = select_rows(Post.objects.filter(pk=post_id), fields).first()
+    if row is None:
+        # Как get_post_or_archived: архив читается, только если поста
+        # нет среди горячих.
+        row = select_rows(
+            ArchivedPost.objects.filter(pk=post_id), fields
+        ).first()
+    if row is None:
+        raise Http404('Пост не найден')
+    add_row_tags(request, row)
+    return serialize(row, fields)
@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from .cache import invalidate_tags
+from .models import ArchivedPost, AuthorStats, Group, Post, TimelineEntry
+from .paginators import ArchiveFeed
+
+# Посты старше стольких дней переносятся в архив по умолчанию.
+ARCHIVE_AFTER_DAYS = 365
+BATCH_SIZE = 500
+# Поля, которые переезжают в ArchivedPost вместе с id поста.
+ARCHIVED_FIELDS = (
+    'id', 'text', 'pub_date', 'updated', 'author_id', 'group_id',
+    'image', 'thumbnails_ready',
+)
+
+
+def author_feed(author):
+    """Посты автора из горячей таблицы и архива одной лентой.
+
+    Пока у автора нет постов в архиве, это обычный queryset.
+    """
+    try:
+        archived_until = author.stats.archived_until
+    except AuthorStats.DoesNotExist:
+        archived_until = None
+    if archived_until is None:
+        return author.posts.all()
+    return ArchiveFeed(
+        author.posts.all(), author.archived_posts.all(), archived_until
+    )
+
+
+def group_feed(group):
+    """Посты группы из горячей таблицы и архива одной лентой."""
+    if group.archived_until is None:
+        return group.posts.all()
+    return ArchiveFeed(
+        group.posts.all(), group.archived_posts.all(), group.archived_until
+    )
+
+
+def get_post_or_archived(pk, *related):
+    """Пост по id: сначала из горячей таблицы, затем из архива.
+
+    Архив читается, только если поста нет среди горячих, поэтому
+    страница свежего поста стоит прежний один запрос.
+    """
+    try:
+        return Post.objects.select_related(*related).get(pk=pk)
+    except Post.DoesNotExist:
+        return get_object_or_404(
+            ArchivedPost.objects.select_related(*related), pk=pk
+        )
+
+
+def _move_boundaries(model, newest):
+    """Сдвигает archived_until вперёд до самого нового из
+    перенесённых постов; назад граница не двигается."""
+    for pk, pub_date in newest.items():
+        model.objects.filter(pk=pk).exclude(
+            archived_until__gte=pub_date
+        ).update(archived_until=pub_date)
+
+
+def archive_batch(cutoff, batch_size=BATCH_SIZE):
+    """Переносит в архив до batch_size постов старше cutoff.
+
+    Копирование, удаление и сдвиг границ архива у авторов и групп идут
+    в одной транзакции: пост всегда лежит ровно в одном из хранилищ.
+    Удаление не проходит через сигналы: счётчики постов считают и архив,
+    а кэш лент сбрасывается одним вызовом на пачку. Возвращает число
+    перенесённых постов.
+    """
+    with transaction.atomic():
+        rows = list(
+            Post.objects.filter(pub_date__lt=cutoff)
+            .order_by('pub_date', 'id')
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        ArchivedPost.objects.bulk_create(
+            [ArchivedPost(**row) for row in rows]
+        )
+        # Ленты подписчиков читают только горячие посты.
+        entries = TimelineEntry.objects.filter(post_id__in=ids)
+        entries._raw_delete(entries.db)
+        posts = Post.objects.filter(pk__in=ids)
+        posts._raw_delete(posts.db)
+
+        authors, groups = {}, {}
+        for row in rows:
+            authors[row['author_id']] = row['pub_date']
+            if row['group_id'] is not None:
+                groups[row['group_id']] = row['pub_date']
+        # Строк счётчиков может не быть у авторов из импорта.
+        AuthorStats.objects.bulk_create(
+            [AuthorStats(author_id=author_id) for author_id in authors],
+            ignore_conflicts=True
+        )
+        _move_boundaries(AuthorStats, authors)
+        _move_boundaries(Group, groups)
+    tags = {'feed:index'}
+    tags.update(f'feed:author:{author_id}' for author_id in authors)
+    tags.update(f'feed:group:{group_id}' for group_id in groups)
+    invalidate_tags(*tags)
+    return len(rows)
+
+
+def archive_posts(cutoff, batch_size=BATCH_SIZE):
+    """Переносит в архив все посты старше cutoff, пачка за пачкой;
+    после каждой пачки блокировка записи отпускается."""
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from .models import Post
+
+
+def chunked(iterable, size):
+    """Режет поток на списки по size элементов, не читая его целиком."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def keep_given_dates():
+    """Отключает auto_now_add/auto_now, чтобы bulk_create сохранил
+    переданные даты постов."""
+    fields = [Post._meta.get_field(name) for name in ('pub_date', 'updated')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
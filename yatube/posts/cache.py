@@ -0,0 +1,200 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache, caches
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+
+from core.routers import snapshot_time
+
+# Версии тегов лежат в общем для процессов кэше: сброс из одного
+# воркера или из команды (import_posts, archive_posts, run_jobs) сразу
+# виден всем. Страницы и списки тегов страниц остаются в кэше процесса:
+# перед ответом они всегда сверяются с общими версиями.
+TAGS_ALIAS = 'shared'
+TAG_KEY = 'posts:tag:{}'
+PAGE_KEY = 'posts:page:{}'
+DEPS_KEY = 'posts:deps:{}'
+DEPS_TIMEOUT = 24 * 60 * 60
+PAGE_TIMEOUT = 300
+# Так помечены версии, выданные при чтении тега, которого не было в кэше:
+# в отличие от сброса, они не означают, что данные поменялись.
+READ_SUFFIX = 'r'
+
+
+def new_tag_version(suffix=''):
+    return f'{time.time():.6f}{suffix}'
+
+
+def version_time(version):
+    return float(version.rstrip(READ_SUFFIX))
+
+
+def tag_cache():
+    return caches[TAGS_ALIAS]
+
+
+def get_tag_versions(tags):
+    """Возвращает версии тегов; отсутствующим в кэше выдаёт новые."""
+    keys = {TAG_KEY.format(tag): tag for tag in tags}
+    versions = tag_cache().get_many(keys)
+    missing = {
+        key: new_tag_version(READ_SUFFIX)
+        for key in keys if key not in versions
+    }
+    if missing:
+        tag_cache().set_many(missing, None)
+        versions.update(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def changed_since(versions, started):
+    """Сбрасывали ли какой-нибудь из тегов после момента started."""
+    return any(
+        version_time(v) >= started and not v.endswith(READ_SUFFIX)
+        for v in versions.values()
+    )
+
+
+def invalidate_tags(*tags):
+    """Выдаёт тегам новые версии: всё, что было закэшировано под старыми,
+    перестаёт находиться по ключу."""
+    version = new_tag_version()
+    tag_cache().set_many({TAG_KEY.format(tag): version for tag in tags}, None)
+
+
+def post_tags(post):
+    tags = [f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id is not None:
+        tags.append(f'group:{post.group_id}')
+    return tags
+
+
+def tags_version(tags):
+    """Строка, которая меняется при сбросе любого из тегов."""
+    versions = get_tag_versions(tags)
+    return '-'.join(versions[tag] for tag in tags)
+
+
+def feed_tags(post):
+    """Теги лент, в которых появляется или из которых пропадает пост."""
+    tags = ['feed:index', f'feed:author:{post.author_id}']
+    if post.group_id is not None:
+        tags.append(f'feed:group:{post.group_id}')
+    return tags
+
+
+def page_tags(page):
+    """Теги всех постов, авторов и групп на странице ленты."""
+    tags = set()
+    for post in page:
+        tags.update(post_tags(post))
+    return tags
+
+
+def path_hash(request):
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def cache_for_anonymous(view):
+    """Кэширует страницу целиком для неавторизованных посетителей.
+
+    Вью перечисляет в `request.cache_tags`, от чего зависит страница;
+    запись из кэша отдаётся, только пока версии всех этих тегов не
+    изменились. Если тег сбросили во время рендера, страница в кэш
+    не попадает.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        request.cache_tags = set()
+        if request.method not in ('GET', 'HEAD') or (
+            request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+        key = PAGE_KEY.format(path_hash(request))
+        entry = cache.get(key)
+        if entry is not None:
+            response, versions = entry
+            if get_tag_versions(versions) == versions:
+                return response
+        started = snapshot_time()
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        if (
+            request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and request.cache_tags
+        ):
+            versions = get_tag_versions(request.cache_tags)
+            if not changed_since(versions, started):
+                cache.set(key, (response, versions), PAGE_TIMEOUT)
+        return response
+    return wrapped
+
+
+def viewer_tags(request):
+    """Теги того, что на странице зависит от самого посетителя:
+    имя в шапке и кнопки подписки."""
+    if not request.user.is_authenticated:
+        return set()
+    return {f'author:{request.user.pk}', f'reader:{request.user.pk}'}
+
+
+def page_validators(request, versions):
+    """ETag и Last-Modified страницы по версиям её тегов: страница
+    для каждого пользователя своя из-за шапки, поэтому его id тоже
+    входит в ETag."""
+    state = '|'.join(
+        f'{tag}={versions[tag]}' for tag in sorted(versions)
+    )
+    etag = hashlib.md5(
+        f'{request.get_full_path()}|{request.user.pk}|{state}'.encode()
+    ).hexdigest()
+    last_modified = max(version_time(v) for v in versions.values())
+    return quote_etag(etag), int(last_modified)
+
+
+def conditional_page(view):
+    """Отвечает 304 на If-None-Match/If-Modified-Since, не вызывая вью.
+
+    После рендера запоминает теги страницы; при следующем запросе
+    валидаторы считаются по их версиям без обращения к базе.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        deps_key = DEPS_KEY.format(
+            f'{path_hash(request)}:{request.user.pk}'
+        )
+        tags = cache.get(deps_key)
+        if tags:
+            etag, last_modified = page_validators(
+                request, get_tag_versions(tags)
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return response
+        started = snapshot_time()
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and getattr(
+            request, 'cache_tags', None
+        ):
+            tags = request.cache_tags | viewer_tags(request)
+            cache.set(deps_key, sorted(tags), DEPS_TIMEOUT)
+            versions = get_tag_versions(tags)
+            if not changed_since(versions, started):
+                etag, last_modified = page_validators(request, versions)
+                response.setdefault('ETag', etag)
+                response.setdefault('Last-Modified', http_date(last_modified))
+        patch_cache_control(response, no_cache=True)
+        return response
+    return wrapped
@@ -0,0 +1,88 @@
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import ArchivedPost, AuthorStats, Group, Post
+
+
+def _shifted_count(delta):
+    """Новое значение счётчика. Посты из bulk_create не увеличивали
+    счётчик, поэтому при их удалении он не уходит ниже нуля."""
+    return Greatest(F('posts_count') + delta, 0)
+
+
+def change_author_posts_count(author_id, delta):
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        posts_count=_shifted_count(delta)
+    )
+    if not updated and delta > 0:
+        AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults={'posts_count': delta}
+        )
+
+
+def change_group_posts_count(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=_shifted_count(delta)
+        )
+
+
+def _count_posts(**lookup):
+    """Подзапрос с числом постов, сгруппированных по полю из lookup:
+    горячих и перенесённых в архив."""
+    field = next(iter(lookup))
+    counts = [
+        Coalesce(
+            Subquery(
+                model.objects.filter(**lookup)
+                .order_by()
+                .values(field)
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0
+        )
+        for model in (Post, ArchivedPost)
+    ]
+    return counts[0] + counts[1]
+
+
+def _newest_archived(**lookup):
+    """Подзапрос с датой самого нового поста в архиве."""
+    field = next(iter(lookup))
+    return Subquery(
+        ArchivedPost.objects.filter(**lookup)
+        .order_by()
+        .values(field)
+        .annotate(newest=Max('pub_date'))
+        .values('newest')
+    )
+
+
+def recount_posts_counters(batch_size=1000):
+    """Пересчитывает счётчики постов всех авторов и групп двумя UPDATE
+    с подзапросами вместо обхода объектов в Python. Заодно выставляет
+    границы архива, по которым ленты решают, читать ли его."""
+    author_ids = (
+        Post.objects.order_by()
+        .values_list('author_id', flat=True)
+        .union(ArchivedPost.objects.order_by().values_list('author_id'))
+        .iterator()
+    )
+    batch = []
+    for author_id in author_ids:
+        batch.append(AuthorStats(author_id=author_id))
+        if len(batch) >= batch_size:
+            AuthorStats.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    AuthorStats.objects.bulk_create(batch, ignore_conflicts=True)
+
+    authors = AuthorStats.objects.update(
+        posts_count=_count_posts(author=OuterRef('author_id')),
+        archived_until=_newest_archived(author=OuterRef('author_id'))
+    )
+    groups = Group.objects.update(
+        posts_count=_count_posts(group=OuterRef('pk')),
+        archived_until=_newest_archived(group=OuterRef('pk'))
+    )
+    return authors, groups
@@ -0,0 +1,88 @@
+import csv
+import heapq
+import json
+
+from django.db.models import Max
+
+from core.db.snapshot import read_snapshot
+
+# Поля выгрузки совпадают с тем, что принимает import_posts.
+FIELDS = ('id', 'pub_date', 'author', 'group', 'text')
+CHUNK_SIZE = 500
+
+
+def _chunked_rows(queryset, chunk_size):
+    """Строки queryset по возрастанию id порциями по chunk_size.
+
+    Верхняя граница id фиксируется до первой порции: посты, добавленные
+    тем же соединением во время выгрузки, в неё не попадают.
+    """
+    last_pk = queryset.aggregate(last=Max('pk'))['last']
+    if last_pk is None:
+        return
+    rows = queryset.filter(pk__lte=last_pk).order_by('pk').values_list(
+        'pk', 'pub_date', 'author__username', 'group__slug', 'text'
+    )
+    after = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=after)[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        after = chunk[-1][0]
+
+
+def export_rows(feed, chunk_size=CHUNK_SIZE):
+    """Отдаёт посты порциями по возрастанию id.
+
+    feed — queryset или лента из горячих постов и архива (MergedFeed,
+    ArchiveFeed): её источники читаются порциями каждый и сливаются
+    по id, ведь архивный пост сохраняет id исходного. Все источники
+    читаются из одного снимка SQLite (read_snapshot) одной базы:
+    посты, изменённые, удалённые или перенесённые в архив во время
+    выгрузки, попадают в файл в прежнем виде, а добавленные —
+    не попадают. Запись при этом не ждёт, но пока выгрузка идёт,
+    контрольная точка не может перенести журнал WAL в базу целиком.
+    """
+    querysets = getattr(feed, 'querysets', (feed,))
+    # Роутер выбирает реплику для каждого запроса заново; снимок
+    # должен быть один на всю выгрузку.
+    db = querysets[0].db
+    with read_snapshot(db):
+        rows = heapq.merge(*(
+            _chunked_rows(queryset.using(db), chunk_size)
+            for queryset in querysets
+        ))
+        for pk, pub_date, author, group, text in rows:
+            yield {
+                'id': pk,
+                'pub_date': pub_date.isoformat(),
+                'author': author,
+                'group': group or '',
+                'text': text,
+            }
+
+
+def render_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+FORMATS = {
+    'jsonl': (render_jsonl, 'application/x-ndjson; charset=utf-8'),
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+}
@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatechars
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from .cache import cache_for_anonymous, conditional_page, page_tags
+from .models import Group, Post
+
+User = get_user_model()
+
+FEED_SIZE = 20
+
+
+class PostsFeed(Feed):
+    """Лента последних постов.
+
+    Экземпляр создаётся на каждый запрос, чтобы `items` могли записать
+    в `request.cache_tags` теги выведенных постов: XML из кэша отдаётся,
+    пока в ленте не появился новый пост и не поменялся ни один из
+    показанных.
+    """
+
+    def __init__(self, request, feed_type=Rss201rev2Feed):
+        self.request = request
+        self.feed_type = feed_type
+
+    def __call__(self, request, *args, **kwargs):
+        response = super().__call__(request, *args, **kwargs)
+        # Last-Modified по дате последнего поста перебил бы валидаторы
+        # conditional_page, которые учитывают и правки постов.
+        del response['Last-Modified']
+        return response
+
+    def scope_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        posts = list(
+            self.scope_posts(obj).select_related('author', 'group')[
+                :FEED_SIZE
+            ]
+        )
+        self.request.cache_tags.update(page_tags(posts))
+        return posts
+
+    def item_title(self, item):
+        return truncatechars(item.text, 50)
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_description(self, item):
+        return item.text
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+
+class IndexFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов Yatube'
+
+    def get_object(self, request):
+        request.cache_tags.add('feed:index')
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        group = get_object_or_404(Group, slug=slug)
+        request.cache_tags.update(
+            (f'group:{group.pk}', f'feed:group:{group.pk}')
+        )
+        return group
+
+    def scope_posts(self, obj):
+        return obj.posts.all()
+
+    def title(self, obj):
+        return f'Yatube: записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        author = get_object_or_404(User, username=username)
+        request.cache_tags.update(
+            (f'author:{author.pk}', f'feed:author:{author.pk}')
+        )
+        return author
+
+    def scope_posts(self, obj):
+        return obj.posts.all()
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+
+def feed_view(feed_class, feed_type=Rss201rev2Feed):
+    @conditional_page
+    @cache_for_anonymous
+    def view(request, *args, **kwargs):
+        return feed_class(request, feed_type)(request, *args, **kwargs)
+    return view
+
+
+index_rss = feed_view(IndexFeed)
+index_atom = feed_view(IndexFeed, Atom1Feed)
+group_rss = feed_view(GroupFeed)
+group_atom = feed_view(GroupFeed, Atom1Feed)
+author_rss = feed_view(AuthorFeed)
+author_atom = feed_view(AuthorFeed, Atom1Feed)
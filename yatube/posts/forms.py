@@ -15,3 +15,12 @@ class PostForm(forms.ModelForm):
             'text': 'Текст нового поста',
             'group': 'Группа, к которой будет относиться пост'
         }
+
+
+class PostImageForm(forms.ModelForm):
+    """Картинка поста. Отдельно от PostForm, чтобы текст и группа
+    проверялись и без загрузки файла."""
+
+    class Meta:
+        model = Post
+        fields = ('image',)
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.archive import ARCHIVE_AFTER_DAYS, BATCH_SIZE, archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше заданного срока в архивную таблицу; '
+        'профили, группы и страницы постов продолжают их показывать'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько постов переносить в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days не может быть отрицательным')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        moved = archive_posts(cutoff, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'В архив перенесено постов: {moved}'
+        ))
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import CHUNK_SIZE, FORMATS, export_rows
+from posts.models import ArchivedPost, Group, Post
+from posts.paginators import MergedFeed
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты автора, группы или всего сайта в JSONL '
+        'или CSV, пригодные для import_posts'
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument('--author', help='username автора')
+        source.add_argument('--group', help='slug группы')
+        parser.add_argument(
+            '--format', choices=sorted(FORMATS), default='jsonl'
+        )
+        parser.add_argument(
+            '--output', default='-', help='Файл для выгрузки или - для stdout'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['author']:
+            lookup = {'author__username': options['author']}
+            if not User.objects.filter(username=options['author']).exists():
+                raise CommandError(f'Нет автора {options["author"]}')
+        elif options['group']:
+            lookup = {'group__slug': options['group']}
+            if not Group.objects.filter(slug=options['group']).exists():
+                raise CommandError(f'Нет группы {options["group"]}')
+        else:
+            lookup = {}
+        # Посты из архива выгружаются вместе с горячими.
+        posts = MergedFeed(
+            Post.objects.filter(**lookup),
+            ArchivedPost.objects.filter(**lookup)
+        )
+
+        render_rows, _ = FORMATS[options['format']]
+        chunks = render_rows(export_rows(posts, options['chunk_size']))
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+        else:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as f:
+                f.writelines(chunks)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Нарезает превью постов, которые остались без них: пул потоков '
+        'теряет невыполненные задачи при перезапуске процесса'
+    )
+
+    def handle(self, *args, **options):
+        # Список id читается целиком: по ходу обхода посты обновляются.
+        pending = list(
+            Post.objects.filter(thumbnails_ready=False).exclude(
+                image=''
+            ).values_list('pk', flat=True)
+        )
+        done = failed = 0
+        for post_id in pending:
+            try:
+                ready = generate(post_id)
+            except Exception as error:
+                self.stderr.write(f'Пост {post_id}: {error}')
+                failed += 1
+            else:
+                done += ready
+        self.stdout.write(self.style.SUCCESS(
+            f'Превью нарезаны для постов: {done}, с ошибкой: {failed}'
+        ))
@@ -0,0 +1,223 @@
+import csv
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import chunked, keep_given_dates
+from posts.cache import invalidate_tags
+from posts.counters import recount_posts_counters
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield number, error
+                continue
+            if not isinstance(record, dict):
+                record = ValueError('запись не является объектом JSON')
+            yield number, record
+
+
+def read_csv(stream):
+    for number, row in enumerate(csv.DictReader(stream), 2):
+        yield number, row
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+class IdMap:
+    """Кэш соответствия имени пользователя или слага группы и id.
+
+    Растёт с числом разных авторов и групп, но не с числом постов.
+    """
+
+    def __init__(self, model, field, create_missing, defaults):
+        self.model = model
+        self.field = field
+        self.create_missing = create_missing
+        self.defaults = defaults
+        self.ids = {}
+
+    def _load(self, keys):
+        self.ids.update(
+            self.model.objects.filter(
+                **{f'{self.field}__in': keys}
+            ).values_list(self.field, 'pk')
+        )
+
+    def resolve(self, keys):
+        missing = list({key for key in keys if key not in self.ids})
+        if not missing:
+            return
+        self._load(missing)
+        missing = [key for key in missing if key not in self.ids]
+        if missing and self.create_missing:
+            self.model.objects.bulk_create(
+                [self.defaults(key) for key in missing],
+                ignore_conflicts=True
+            )
+            self._load(missing)
+
+
+def parse_pub_date(value, default):
+    """Дата публикации записи; без даты — default.
+
+    ValueError, если дата не строка или такой даты не бывает.
+    """
+    if not value:
+        return default
+    try:
+        pub_date = parse_datetime(value)
+    except TypeError:
+        raise ValueError(f'pub_date не строка: {value!r}')
+    except ValueError:
+        raise ValueError(f'неверная pub_date {value}')
+    if pub_date is None:
+        return default
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def check_record(record, now):
+    """Дата публикации записи; ValueError, если запись не годится."""
+    if isinstance(record, Exception):
+        raise record
+    if not record.get('text') or not record.get('author'):
+        raise ValueError('нет text или author')
+    for field in ('text', 'author', 'group'):
+        if record.get(field) and not isinstance(record[field], str):
+            raise ValueError(f'{field} не строка')
+    return parse_pub_date(record.get('pub_date'), now)
+
+
+def new_user(username):
+    user = User(username=username)
+    user.set_unusable_password()
+    return user
+
+
+def new_group(slug):
+    return Group(title=slug, slug=slug, description='')
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает посты из JSONL или CSV. У каждой записи есть '
+        'text и author (username), необязательные group (slug) и '
+        'pub_date (ISO 8601). Ленты подписчиков при загрузке не '
+        'заполняются, счётчики постов пересчитываются в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами или - для stdin')
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Формат файла; по умолчанию определяется по расширению'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать отсутствующих авторов и группы'
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or options['path'].rsplit('.', 1)[-1]
+        if fmt not in READERS:
+            raise CommandError(f'Неизвестный формат: {fmt}')
+        create_missing = options['create_missing']
+        self.authors = IdMap(User, 'username', create_missing, new_user)
+        self.groups = IdMap(Group, 'slug', create_missing, new_group)
+        self.author_ids = set()
+        self.group_ids = set()
+        self.skipped = 0
+
+        if options['path'] == '-':
+            self.run(READERS[fmt](sys.stdin), options['batch_size'])
+        else:
+            with open(options['path'], encoding='utf-8', newline='') as f:
+                self.run(READERS[fmt](f), options['batch_size'])
+
+        recount_posts_counters()
+        invalidate_tags(
+            'feed:index',
+            *(f'feed:author:{pk}' for pk in self.author_ids),
+            *(f'feed:group:{pk}' for pk in self.group_ids),
+        )
+
+    def run(self, records, batch_size):
+        started = time.monotonic()
+        imported = 0
+        with keep_given_dates():
+            for chunk in chunked(records, batch_size):
+                posts = self.build_posts(chunk)
+                # batch_size не передаётся: Django 2.2 не урезает явный
+                # размер пачки до лимита параметров SQLite в одном INSERT,
+                # а по умолчанию сам делит вставку на допустимые части.
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                imported += len(posts)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Загружено {imported}, пропущено {self.skipped}, '
+                    f'{imported / elapsed:.0f} постов/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {imported} постов за '
+            f'{time.monotonic() - started:.1f} с'
+        ))
+
+    def skip(self, number, reason):
+        self.skipped += 1
+        self.stderr.write(f'Строка {number}: {reason}')
+
+    def build_posts(self, chunk):
+        now = timezone.now()
+        records = []
+        for number, record in chunk:
+            try:
+                pub_date = check_record(record, now)
+            except ValueError as error:
+                self.skip(number, error)
+            else:
+                records.append((number, record, pub_date))
+        self.authors.resolve([record['author'] for _, record, _ in records])
+        self.groups.resolve([
+            record['group'] for _, record, _ in records if record.get('group')
+        ])
+
+        posts = []
+        for number, record, pub_date in records:
+            author_id = self.authors.ids.get(record['author'])
+            group_id = self.groups.ids.get(record.get('group'))
+            if author_id is None:
+                self.skip(number, f'нет автора {record["author"]}')
+                continue
+            if record.get('group') and group_id is None:
+                self.skip(number, f'нет группы {record["group"]}')
+                continue
+            self.author_ids.add(author_id)
+            if group_id is not None:
+                self.group_ids.add(group_id)
+            posts.append(Post(
+                text=record['text'],
+                author_id=author_id,
+                group_id=group_id,
+                pub_date=pub_date,
+                updated=pub_date
+            ))
+        return posts
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_posts_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов у авторов и групп'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк счётчиков авторов создавать за раз'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            authors, groups = recount_posts_counters(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано авторов: {authors}, групп: {groups}'
+        ))
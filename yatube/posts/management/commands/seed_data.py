@@ -0,0 +1,169 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import Mixer
+
+from posts.bulk import chunked, keep_given_dates
+from posts.cache import invalidate_tags
+from posts.counters import recount_posts_counters
+from posts.models import Follow, Group, Post
+from posts.timeline import backfill
+
+User = get_user_model()
+
+SENTENCES_POOL = 5000
+# Доля постов без группы.
+UNGROUPED = 0.3
+
+
+def zipf_weights(count, skew):
+    """Накопленные веса закона Ципфа: первые элементы выбираются
+    намного чаще остальных, дальше тянется длинный хвост."""
+    return list(accumulate(1 / (rank ** skew) for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими авторами, группами, постами и '
+        'подписками. Посты распределены по авторам и группам по закону '
+        'Ципфа: несколько популярных и длинный хвост.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument(
+            '--follows', type=int, default=3,
+            help='Сколько авторов читает каждый новый пользователь'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить посты'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа; больше — сильнее перекос'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.mixer = Mixer(commit=False)
+        self.batch_size = options['batch_size']
+        prefix = options['prefix']
+
+        author_ids = self.create_users(prefix, options['authors'])
+        group_ids = self.create_groups(prefix, options['groups'])
+        self.create_posts(
+            options['posts'], author_ids, group_ids,
+            options['skew'], options['days']
+        )
+        follows = self.create_follows(
+            author_ids, options['follows'], options['skew']
+        )
+        recount_posts_counters(self.batch_size)
+        for user_id, author_id in follows:
+            backfill(User(pk=user_id), User(pk=author_id))
+        invalidate_tags(
+            'feed:index',
+            *(f'feed:author:{pk}' for pk in author_ids),
+            *(f'feed:group:{pk}' for pk in group_ids),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано авторов: {len(author_ids)}, групп: {len(group_ids)}, '
+            f'постов: {options["posts"]}, подписок: {len(follows)}'
+        ))
+
+    def create_users(self, prefix, count):
+        users = self.mixer.cycle(count).blend(
+            User,
+            username=self.mixer.sequence(f'{prefix}_user{{0}}'),
+            is_staff=False,
+            is_superuser=False,
+        )
+        for user in users:
+            user.set_unusable_password()
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_user'
+        ).order_by('pk').values_list('pk', flat=True)[:count])
+
+    def create_groups(self, prefix, count):
+        groups = self.mixer.cycle(count).blend(
+            Group,
+            slug=self.mixer.sequence(f'{prefix}-group{{0}}'),
+            posts_count=0,
+        )
+        for group in groups:
+            group.title = self.fake.catch_phrase()[:200]
+        Group.objects.bulk_create(groups, ignore_conflicts=True)
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-group'
+        ).order_by('pk').values_list('pk', flat=True)[:count])
+
+    def generate_posts(self, count, author_ids, group_ids, skew, days):
+        sentences = [self.fake.sentence() for _ in range(SENTENCES_POOL)]
+        author_weights = zipf_weights(len(author_ids), skew)
+        group_weights = zipf_weights(len(group_ids), skew)
+        step = timedelta(days=days) / max(count, 1)
+        pub_date = timezone.now() - timedelta(days=days)
+        for _ in range(count):
+            pub_date += step * self.rng.random() * 2
+            group_id = None
+            if group_ids and self.rng.random() >= UNGROUPED:
+                group_id = self.rng.choices(
+                    group_ids, cum_weights=group_weights
+                )[0]
+            yield Post(
+                text=' '.join(
+                    self.rng.choices(sentences, k=self.rng.randint(1, 6))
+                ),
+                author_id=self.rng.choices(
+                    author_ids, cum_weights=author_weights
+                )[0],
+                group_id=group_id,
+                pub_date=pub_date,
+                updated=pub_date,
+            )
+
+    def create_posts(self, count, author_ids, group_ids, skew, days):
+        started = time.monotonic()
+        created = 0
+        posts = self.generate_posts(count, author_ids, group_ids, skew, days)
+        with keep_given_dates():
+            for chunk in chunked(posts, self.batch_size):
+                with transaction.atomic():
+                    Post.objects.bulk_create(chunk)
+                created += len(chunk)
+                self.stdout.write(
+                    f'Постов: {created} из {count}, '
+                    f'{created / (time.monotonic() - started):.0f} в секунду'
+                )
+
+    def create_follows(self, author_ids, per_user, skew):
+        weights = zipf_weights(len(author_ids), skew)
+        follows = set()
+        for user_id in author_ids:
+            for author_id in self.rng.choices(
+                author_ids, cum_weights=weights, k=per_user
+            ):
+                if author_id != user_id:
+                    follows.add((user_id, author_id))
+        Follow.objects.bulk_create(
+            (Follow(user_id=user, author_id=author)
+             for user, author in follows),
+            ignore_conflicts=True
+        )
+        return sorted(follows)
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from posts import search
+
+
+def create_search_index(apps, schema_editor):
+    if not search.is_supported(schema_editor.connection):
+        return
+    search.install_triggers(schema_editor)
+    schema_editor.execute(search.REBUILD_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if not search.is_supported(schema_editor.connection):
+        return
+    for action in ('insert', 'delete', 'update'):
+        schema_editor.execute(
+            f'DROP TRIGGER IF EXISTS {search.FTS_TABLE}_{action}'
+        )
+    schema_editor.execute(f'DROP TABLE IF EXISTS {search.FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
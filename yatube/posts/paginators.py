@@ -0,0 +1,354 @@
+import datetime
+import hashlib
+import heapq
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import F, Func, IntegerField, Max, Subquery
+from django.http import Http404
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+ORDERING = ('-pub_date', '-pk')
+
+
+def make_cursor(pub_date, pk):
+    """Кодирует позицию в ленте в строку вида `<мкс>_<id>`."""
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date, datetime.timezone.utc)
+    microseconds = (pub_date - EPOCH) // datetime.timedelta(microseconds=1)
+    return f'{microseconds}_{pk}'
+
+
+def encode_cursor(post):
+    return make_cursor(post.pub_date, post.pk)
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор, для испорченного значения возвращает None."""
+    try:
+        microseconds, pk = (int(part) for part in cursor.split('_'))
+        pub_date = EPOCH + datetime.timedelta(microseconds=microseconds)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    if not settings.USE_TZ:
+        pub_date = timezone.make_naive(pub_date, datetime.timezone.utc)
+    return pub_date, pk
+
+
+def feed_key(item):
+    """Ключ (pub_date, id) поста или строки values() для слияния лент."""
+    if isinstance(item, dict):
+        return item['pub_date'], item['id']
+    return item.pub_date, item.pk
+
+
+class MergedFeed:
+    """Лента, склеенная из нескольких упорядоченных querysets.
+
+    Фильтры и сортировка применяются к каждому источнику, а срез
+    берётся из их слияния по (pub_date, pk): так KeysetPaginator
+    листает сразу несколько лент, каждая из которых идёт по своему
+    индексу. Посты, попавшие в несколько источников, выводятся один раз.
+    """
+
+    def __init__(self, *querysets, descending=True, offset=0):
+        self.querysets = querysets
+        self.descending = descending
+        self.offset = offset
+
+    def _clone(self, querysets=None, **kwargs):
+        options = {'descending': self.descending, 'offset': self.offset}
+        options.update(kwargs)
+        return MergedFeed(*(querysets or self.querysets), **options)
+
+    def _apply(self, method, *args, **kwargs):
+        return self._clone([
+            getattr(queryset, method)(*args, **kwargs)
+            for queryset in self.querysets
+        ])
+
+    def filter(self, *args, **kwargs):
+        return self._apply('filter', *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._apply('exclude', *args, **kwargs)
+
+    def select_related(self, *fields):
+        return self._apply('select_related', *fields)
+
+    def values(self, *fields):
+        return self._apply('values', *fields)
+
+    def order_by(self, *fields):
+        merged = self._apply('order_by', *fields)
+        merged.descending = fields[0].startswith('-')
+        return merged
+
+    def reverse(self):
+        merged = self._apply('reverse')
+        merged.descending = not self.descending
+        return merged
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = self.offset + (index.start or 0)
+        if index.stop is None:
+            return self._clone(offset=start)
+        stop = self.offset + index.stop
+        streams = [queryset[:stop] for queryset in self.querysets]
+        merged = heapq.merge(
+            *streams, key=feed_key, reverse=self.descending
+        )
+        seen = set()
+        result = []
+        for post in merged:
+            _, pk = feed_key(post)
+            if pk not in seen:
+                seen.add(pk)
+                result.append(post)
+            if len(result) == stop:
+                break
+        return result[start:stop]
+
+
+class ArchiveFeed(MergedFeed):
+    """Лента из горячих постов и архива, где все посты не новее
+    archived_until.
+
+    Архив читается, только если горячих постов не хватило на срез
+    или последний из них старше границы архива: первые страницы
+    активного автора по-прежнему стоят один запрос.
+    """
+
+    def __init__(self, hot, archive, archived_until, **options):
+        super().__init__(hot, archive, **options)
+        self.archived_until = archived_until
+
+    def _clone(self, querysets=None, **kwargs):
+        options = {'descending': self.descending, 'offset': self.offset}
+        options.update(kwargs)
+        return ArchiveFeed(
+            *(querysets or self.querysets), self.archived_until, **options
+        )
+
+    def __getitem__(self, index):
+        if (
+            not isinstance(index, slice)
+            or index.stop is None
+            or not self.descending
+        ):
+            return super().__getitem__(index)
+        start = self.offset + (index.start or 0)
+        stop = self.offset + index.stop
+        hot, archive = self.querysets
+        posts = list(hot[:stop])
+        if (
+            len(posts) < stop
+            or feed_key(posts[-1])[0] <= self.archived_until
+        ):
+            posts = list(heapq.merge(
+                posts, archive[:stop], key=feed_key, reverse=True
+            ))
+        return posts[start:stop]
+
+
+class KeysetPage(Page):
+    """Страница ленты, которая не знает ни своего номера, ни общего числа
+    страниц: соседние страницы адресуются курсорами."""
+
+    def __init__(self, object_list, number, paginator,
+                 has_newer=False, has_older=False):
+        super().__init__(object_list, number, paginator)
+        self.has_newer = has_newer
+        self.has_older = has_older
+
+    def __repr__(self):
+        if self.number is None:
+            return '<Page (cursor)>'
+        return super().__repr__()
+
+    def has_next(self):
+        return self.has_older
+
+    def has_previous(self):
+        return self.has_newer
+
+    def next_page_number(self):
+        return self.paginator.validate_number(self.number + 1)
+
+    def previous_page_number(self):
+        return self.paginator.validate_number(self.number - 1)
+
+    @property
+    def older_cursor(self):
+        if self.has_older and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def newer_cursor(self):
+        if self.has_newer and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class KeysetPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Старые ссылки `?page=N` обслуживаются через OFFSET, но только для
+    первых `max_offset_page` страниц: глубже краулерам открыт путь
+    лишь по курсорам.
+    """
+
+    max_offset_page = 5
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(
+            object_list.order_by(*ORDERING), per_page, **kwargs
+        )
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise Http404('Номер страницы должен быть целым числом')
+        if number < 1 or number > self.max_offset_page:
+            raise Http404('Листайте ленту дальше по ссылке «Старые записи»')
+        return number
+
+    def _fetch(self, queryset):
+        rows = list(queryset[:self.per_page + 1])
+        return rows[:self.per_page], len(rows) > self.per_page
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list, has_older = self._fetch(self.object_list[bottom:])
+        return KeysetPage(
+            object_list, number, self,
+            has_newer=number > 1, has_older=has_older
+        )
+
+    def page_older(self, cursor):
+        """Страница постов, опубликованных раньше поста из курсора."""
+        pub_date, pk = cursor
+        # `pub_date <= d AND NOT (pub_date = d AND id >= pk)` вместо OR,
+        # чтобы SQLite шёл по индексу диапазоном, а не сканом.
+        queryset = self.object_list.filter(
+            pub_date__lte=pub_date
+        ).exclude(pub_date=pub_date, pk__gte=pk)
+        object_list, has_older = self._fetch(queryset)
+        return KeysetPage(
+            object_list, None, self, has_newer=True, has_older=has_older
+        )
+
+    def page_newer(self, cursor):
+        """Страница постов, опубликованных позже поста из курсора."""
+        pub_date, pk = cursor
+        queryset = self.object_list.filter(
+            pub_date__gte=pub_date
+        ).exclude(pub_date=pub_date, pk__lte=pk).reverse()
+        object_list, has_newer = self._fetch(queryset)
+        object_list.reverse()
+        return KeysetPage(
+            object_list, None, self, has_newer=has_newer, has_older=True
+        )
+
+    def get_page_from_request(self, request):
+        """Выбирает страницу по параметрам `after`, `before` или `page`;
+        некорректный курсор ведёт на первую страницу."""
+        older = decode_cursor(request.GET.get('after'))
+        if older is not None:
+            return self.page_older(older)
+        newer = decode_cursor(request.GET.get('before'))
+        if newer is not None:
+            page = self.page_newer(newer)
+            if page.has_newer:
+                return page
+            return self.page(1)
+        number = request.GET.get('page')
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        return self.page(number)
+
+
+class CountedKeysetPaginator(KeysetPaginator):
+    """Пагинатор по ключу, который знает примерное число записей.
+
+    Число берётся из поддерживаемого счётчика (`count=`, можно передать
+    функцию, чтобы считать только при выводе блока страниц), оценивается
+    по максимальному id для таблицы без фильтров (`estimate=True`) или
+    считается через COUNT(*) не чаще раза в `cache_timeout` секунд.
+
+    Оценка по MAX(id) — верхняя граница: удалённые и перенесённые
+    в архив посты оставляют дыры в id, и число записей и страниц
+    завышается, тем сильнее, чем больше архив. Это принято сознательно:
+    шаблон выводит такое число с пометкой «около», а номера страниц
+    всё равно ограничены `max_offset_page`, и лишняя из них оказывается
+    пустой. Точное число для главной потребовало бы отдельного счётчика
+    горячих постов.
+    """
+
+    cache_timeout = 60
+
+    def __init__(self, object_list, per_page, count=None, estimate=False,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+        self.estimate = estimate
+        self._estimated_count = None
+
+    def _fetch(self, queryset):
+        if not self.is_approximate:
+            return super()._fetch(queryset)
+        # Оценка приезжает вместе со страницей скалярным подзапросом
+        # MAX(id): лента стоит один запрос и на одной странице, и на многих.
+        last_id = self.object_list.model._default_manager.order_by().annotate(
+            last_id=Func(F('pk'), function='MAX')
+        ).values('last_id')
+        object_list, has_more = super()._fetch(queryset.annotate(
+            feed_last_id=Subquery(last_id, output_field=IntegerField())
+        ))
+        if object_list:
+            self._estimated_count = object_list[0].feed_last_id
+        return object_list, has_more
+
+    @cached_property
+    def is_approximate(self):
+        return self._known_count is None and self.estimate
+
+    @cached_property
+    def count(self):
+        if callable(self._known_count):
+            return max(self._known_count(), 0)
+        if self._known_count is not None:
+            return max(self._known_count, 0)
+        if self.estimate:
+            if self._estimated_count is not None:
+                return self._estimated_count
+            return self.object_list.aggregate(
+                last_id=Max('pk')
+            )['last_id'] or 0
+        sql, params = self.object_list.query.sql_with_params()
+        key = 'posts:count:' + hashlib.md5(
+            f'{sql}{params}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, self.cache_timeout)
+        return count
+
+    @property
+    def shallow_page_range(self):
+        """Номера страниц, доступные по старым ссылкам `?page=N`."""
+        return range(1, min(self.num_pages, self.max_offset_page) + 1)
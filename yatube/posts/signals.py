@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from .cache import feed_tags, invalidate_tags
+from .counters import change_author_posts_count, change_group_posts_count
+from .models import Group, Post
+from .tasks import REFILL_TIMELINES
+from .thumbnails import schedule
+from .timeline import cooled_down, fan_out
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_relations(sender, instance, raw, **kwargs):
+    """Запоминает автора и группу поста до сохранения правки."""
+    instance._saved_relations = None
+    if instance.pk is not None and not raw:
+        instance._saved_relations = Post.objects.filter(
+            pk=instance.pk
+        ).values('author_id', 'group_id', 'image').first()
+    saved = instance._saved_relations
+    if saved is not None and saved['image'] != instance.image.name:
+        # Превью от прежней картинки не подходят к новой.
+        instance.thumbnails_ready = False
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    saved = getattr(instance, '_saved_relations', None)
+    if created or saved is None:
+        change_author_posts_count(instance.author_id, 1)
+        change_group_posts_count(instance.group_id, 1)
+        return
+    if saved['author_id'] != instance.author_id:
+        change_author_posts_count(saved['author_id'], -1)
+        change_author_posts_count(instance.author_id, 1)
+    if saved['group_id'] != instance.group_id:
+        change_group_posts_count(saved['group_id'], -1)
+        change_group_posts_count(instance.group_id, 1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnails(sender, instance, raw, **kwargs):
+    if raw or not instance.image or instance.thumbnails_ready:
+        return
+    # Пул берёт задачу только после коммита, иначе не увидит пост.
+    post_id = instance.pk
+    transaction.on_commit(lambda: schedule(post_id))
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    change_author_posts_count(instance.author_id, -1)
+    change_group_posts_count(instance.group_id, -1)
+    if cooled_down(instance.author_id):
+        # Новые посты автора больше не читаются при каждом запросе:
+        # их нужно разложить по лентам, иначе они из лент пропадут.
+        enqueue(REFILL_TIMELINES, {'author_id': instance.author_id})
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    tags = [f'post:{instance.pk}', *feed_tags(instance)]
+    saved = getattr(instance, '_saved_relations', None)
+    if saved is not None:
+        tags.append(f'feed:author:{saved["author_id"]}')
+        if saved['group_id'] is not None:
+            tags.append(f'feed:group:{saved["group_id"]}')
+    invalidate_tags(*tags)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cache(sender, instance, **kwargs):
+    invalidate_tags(f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cache(sender, instance, update_fields, **kwargs):
+    # Вход пользователя сохраняет только last_login: блоки не меняются.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_tags(f'author:{instance.pk}')
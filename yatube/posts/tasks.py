@@ -0,0 +1,11 @@
+from jobs.queue import task
+
+from .timeline import refill_followers
+
+REFILL_TIMELINES = 'posts.refill_timelines'
+
+
+@task(REFILL_TIMELINES)
+def refill_timelines(author_id):
+    """Возвращает в ленты подписчиков посты остывшего автора."""
+    refill_followers(author_id)
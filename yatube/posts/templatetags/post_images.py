@@ -0,0 +1,11 @@
+from django import template
+
+from ..thumbnails import thumbnail_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(post, size):
+    """Адрес готового превью поста; пустая строка, пока оно не нарезано."""
+    return thumbnail_url(post, size)
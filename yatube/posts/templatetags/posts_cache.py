@@ -0,0 +1,11 @@
+from django import template
+
+from ..cache import post_tags, tags_version
+
+register = template.Library()
+
+
+@register.filter
+def fragment_version(post):
+    """Версия блока поста: меняется при правке поста, автора или группы."""
+    return tags_version(post_tags(post))
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostsApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(15)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.index = reverse('posts:api_index')
+
+    def test_feeds_are_paged_by_cursor(self):
+        '''Проверяем, что ленты листаются по курсорам без повторов'''
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+        urls = [
+            self.index,
+            reverse('posts:api_group_list', kwargs={'slug': 'group_slug'}),
+            reverse('posts:api_profile', kwargs={'username': 'hanson'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).json()
+                second = self.client.get(
+                    url, {'after': first['older']}
+                ).json()
+                self.assertIsNone(first['newer'])
+                self.assertIsNone(second['older'])
+                self.assertEqual(
+                    [post['id'] for post in first['posts'] + second['posts']],
+                    expected
+                )
+
+    def test_sparse_fields_skip_joins(self):
+        '''Проверяем, что ?fields= отдаёт только нужные поля одним
+        запросом без join, а неизвестное поле даёт 400'''
+        with self.assertNumQueries(1) as queries:
+            data = self.client.get(self.index, {'fields': 'id,text'}).json()
+        self.assertNotIn('JOIN', queries.captured_queries[0]['sql'])
+        self.assertEqual(set(data['posts'][0]), {'id', 'text'})
+
+        response = self.client.get(self.index, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_is_cached_and_answers_conditional_get(self):
+        '''Проверяем ответ на пост, его кэш и сброс ETag при правке'''
+        post = Post.objects.first()
+        url = reverse('posts:api_post_detail', kwargs={'post_id': post.pk})
+        response = self.client.get(url)
+        self.assertEqual(
+            response.json(),
+            {
+                'id': post.pk,
+                'pub_date': response.json()['pub_date'],
+                'text': post.text,
+                'author': 'hanson',
+                'group': 'group_slug',
+            }
+        )
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        post.text = 'Новый текст'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['text'], 'Новый текст')
+        missing = reverse('posts:api_post_detail', kwargs={'post_id': 0})
+        self.assertEqual(self.client.get(missing).status_code, 404)
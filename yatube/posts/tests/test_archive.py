@@ -0,0 +1,184 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..counters import recount_posts_counters
+from ..models import ArchivedPost, AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def create_posts(self, count, days_ago):
+        Post.objects.bulk_create([
+            Post(text=f'Пост {days_ago}-{i}', author=self.user,
+                 group=self.group)
+            for i in range(count)
+        ])
+        created = Post.objects.filter(
+            text__startswith=f'Пост {days_ago}-'
+        ).values_list('pk', flat=True)
+        for minutes, pk in enumerate(created):
+            Post.objects.filter(pk=pk).update(
+                pub_date=timezone.now() - timedelta(
+                    days=days_ago, minutes=minutes
+                )
+            )
+
+    def archive(self, days=365):
+        out = StringIO()
+        call_command('archive_posts', days=days, batch_size=5, stdout=out)
+        return out.getvalue()
+
+    def feed_ids(self, url):
+        ids, params = [], {}
+        while True:
+            page = self.guest_client.get(url, params).context['page_obj']
+            ids.extend(post.pk for post in page)
+            if not page.has_next():
+                return ids
+            params = {'after': page.older_cursor}
+
+    def test_archived_posts_stay_on_profile_group_and_detail(self):
+        '''Проверяем, что перенесённые в архив посты видны в профиле,
+        группе и на своей странице, а счётчики не меняются'''
+        self.create_posts(12, days_ago=400)
+        self.create_posts(3, days_ago=1)
+        recount_posts_counters()
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+        self.assertIn('12', self.archive())
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(ArchivedPost.objects.count(), 12)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 15
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 15)
+
+        for url in (
+            reverse('posts:profile', kwargs={'username': 'hanson'}),
+            reverse('posts:group_list', kwargs={'slug': 'group_slug'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.feed_ids(url), expected)
+
+        archived = ArchivedPost.objects.first()
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': archived.pk})
+        )
+        self.assertEqual(response.context['post'], archived)
+        index = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(len(index.context['page_obj']), 3)
+
+    def test_hot_pages_do_not_read_archive(self):
+        '''Проверяем, что главная и заполненная горячими постами первая
+        страница профиля не обращаются к архиву'''
+        self.create_posts(5, days_ago=400)
+        self.archive()
+        self.create_posts(12, days_ago=1)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'hanson'}),
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.guest_client.get(url)
+                for query in queries.captured_queries:
+                    self.assertNotIn('posts_archivedpost', query['sql'])
+
+    def test_recount_restores_archive_boundary(self):
+        '''Проверяем, что пересчёт счётчиков учитывает архив'''
+        self.create_posts(2, days_ago=400)
+        self.archive()
+        newest = ArchivedPost.objects.latest('pub_date').pub_date
+        AuthorStats.objects.update(posts_count=0, archived_until=None)
+        recount_posts_counters()
+        stats = AuthorStats.objects.get(author=self.user)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.archived_until, newest)
+
+    def test_exports_and_api_include_archived_posts(self):
+        '''Проверяем, что выгрузки и API отдают посты из архива наравне
+        с горячими'''
+        self.create_posts(8, days_ago=400)
+        self.create_posts(7, days_ago=1)
+        recount_posts_counters()
+        newest_first = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        archived = Post.objects.order_by('pub_date').first()
+        self.archive()
+        self.assertEqual(ArchivedPost.objects.count(), 8)
+
+        author_client = Client()
+        author_client.force_login(self.user)
+        moderator_client = Client()
+        moderator_client.force_login(
+            User.objects.create_user(username='moderator', is_staff=True)
+        )
+        for client, url in (
+            (author_client, reverse(
+                'posts:profile_export', kwargs={'username': 'hanson'}
+            )),
+            (moderator_client, reverse(
+                'posts:group_export', kwargs={'slug': 'group_slug'}
+            )),
+        ):
+            with self.subTest(url=url):
+                response = client.get(url)
+                ids = [
+                    json.loads(line)['id'] for line in
+                    b''.join(response.streaming_content).splitlines()
+                ]
+                self.assertEqual(ids, sorted(newest_first))
+        out = StringIO()
+        call_command('export_posts', '--author', 'hanson', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 15)
+
+        for url in (
+            reverse('posts:api_profile', kwargs={'username': 'hanson'}),
+            reverse('posts:api_group_list', kwargs={'slug': 'group_slug'}),
+        ):
+            with self.subTest(url=url):
+                ids, params = [], {}
+                while True:
+                    data = self.guest_client.get(url, params).json()
+                    ids.extend(post['id'] for post in data['posts'])
+                    if data['older'] is None:
+                        break
+                    params = {'after': data['older']}
+                self.assertEqual(ids, newest_first)
+
+        response = self.guest_client.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': archived.pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['text'], archived.text)
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..models import AuthorStats, Follow, Group, Post
+
+User = get_user_model()
+
+
+class SeedAndBenchTests(TestCase):
+    def seed(self):
+        call_command(
+            'seed_data', '--posts', '300', '--authors', '20',
+            '--groups', '5', stdout=StringIO()
+        )
+
+    def test_seed_data_is_skewed(self):
+        '''Проверяем, что посты распределены с перекосом к первым
+        авторам и группам, а счётчики и подписки заполнены'''
+        self.seed()
+        self.assertEqual(Post.objects.count(), 300)
+        counts = list(AuthorStats.objects.order_by(
+            'author_id'
+        ).values_list('posts_count', flat=True))
+        self.assertEqual(sum(counts), 300)
+        self.assertGreater(counts[0], 5 * counts[-1])
+        groups = list(Group.objects.order_by('pk').values_list(
+            'posts_count', flat=True
+        ))
+        self.assertEqual(groups[0], max(groups))
+        self.assertTrue(Follow.objects.exists())
+
+    def test_bench_reports_and_compares(self):
+        '''Проверяем отчёт бенчмарка и сравнение с прошлым прогоном'''
+        self.seed()
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command(
+            'bench', '--requests', '2', '--warmup', '0',
+            '--user', 'seed_user0', '--output', path
+        )
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        index = report['user']['posts:index']
+        self.assertEqual(index['status'], 200)
+        self.assertLessEqual(index['p50_ms'], index['p99_ms'])
+        self.assertGreater(index['queries'], 0)
+        self.assertIn('about:tech', report['guest'])
+        self.assertNotIn('users:logout', report['user'])
+
+        report['user']['posts:index']['queries'] = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(CommandError, 'user posts:index'):
+            call_command(
+                'bench', '--requests', '2', '--warmup', '0',
+                '--user', 'seed_user0', '--compare', path,
+                '--fail-over', '1000000', stdout=StringIO()
+            )
@@ -0,0 +1,232 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cache import invalidate_tags, post_tags, tags_version
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ArticleFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='hanson', first_name='Ханс'
+        )
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text='Исходный текст', group=self.group
+        )
+        self.other_post = Post.objects.create(
+            author=User.objects.create_user(username='tom'),
+            text='Чужой пост'
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.index = reverse('posts:index')
+
+    def test_fragment_reused_across_feeds(self):
+        '''Проверяем, что блок поста из кэша используется всеми лентами'''
+        self.client.get(self.index)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        urls = [
+            self.index,
+            reverse('posts:profile', kwargs={'username': 'hanson'}),
+            reverse('posts:group_list', kwargs={'slug': 'group_slug'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Исходный текст')
+
+    def test_post_edit_invalidates_only_its_fragment(self):
+        '''Проверяем, что правка поста сбрасывает только его блок'''
+        self.client.get(self.index)
+        other_version = tags_version(post_tags(self.other_post))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Новый текст', 'group': self.group.pk}
+        )
+        response = self.client.get(self.index)
+        self.assertContains(response, 'Новый текст')
+        self.assertEqual(
+            tags_version(post_tags(self.other_post)), other_version
+        )
+
+    def test_author_and_group_changes_invalidate_fragments(self):
+        '''Проверяем, что смена имени автора и слага группы видна в лентах'''
+        self.client.get(self.index)
+        other_version = tags_version(post_tags(self.other_post))
+        self.user.first_name = 'Иоганн'
+        self.user.save()
+        self.group.slug = 'new_slug'
+        self.group.save()
+        response = self.client.get(self.index)
+        self.assertContains(response, 'Иоганн')
+        self.assertContains(response, '/group/new_slug/')
+        self.assertEqual(
+            tags_version(post_tags(self.other_post)), other_version
+        )
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other_slug',
+            description='Описание другой группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text='Исходный текст', group=self.group
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': 'group_slug'}
+            ),
+            'other_group': reverse(
+                'posts:group_list', kwargs={'slug': 'other_slug'}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'hanson'}
+            ),
+            'detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ),
+        }
+
+    def test_anonymous_pages_served_from_cache(self):
+        '''Проверяем, что повторный запрос гостя не ходит в базу,
+        а авторизованный пользователь всегда получает свежую страницу'''
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+        # Первый запрос после входа перечитывает пользователя из базы.
+        self.authorized_client.get(self.urls['index'])
+        with self.assertNumQueries(1):
+            self.authorized_client.get(self.urls['index'])
+
+    def test_post_edit_purges_only_dependent_pages(self):
+        '''Проверяем, что правка поста сбрасывает только страницы,
+        на которых он показан'''
+        for url in self.urls.values():
+            self.client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Новый текст', 'group': self.group.pk}
+        )
+        for name in ('index', 'group', 'profile', 'detail'):
+            with self.subTest(name=name):
+                self.assertContains(
+                    self.client.get(self.urls[name]), 'Новый текст'
+                )
+        with self.assertNumQueries(0):
+            self.client.get(self.urls['other_group'])
+
+    def test_invalidation_from_another_process_purges_pages(self):
+        '''Проверяем, что сброс тегов в другом процессе (команде или
+        воркере со своим кэшем) сразу виден на закэшированных страницах'''
+        for name in ('index', 'detail'):
+            self.client.get(self.urls[name])
+        Post.objects.filter(pk=self.post.pk).update(text='Правка из команды')
+        # У другого процесса свой кэш default: страниц этого процесса
+        # он не видит вовсе.
+        with mock.patch(
+            'posts.cache.cache', LocMemCache('other-process', {})
+        ):
+            invalidate_tags(*post_tags(self.post))
+        for name in ('index', 'detail'):
+            with self.subTest(name=name):
+                self.assertContains(
+                    self.client.get(self.urls[name]), 'Правка из команды'
+                )
+
+    def test_new_post_purges_feeds(self):
+        '''Проверяем, что новый пост сразу виден в лентах гостю'''
+        self.client.get(self.urls['index'])
+        self.client.get(self.urls['other_group'])
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Свежий пост', 'group': self.other_group.pk}
+        )
+        self.assertContains(
+            self.client.get(self.urls['index']), 'Свежий пост'
+        )
+        self.assertContains(
+            self.client.get(self.urls['other_group']), 'Свежий пост'
+        )
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(author=self.user, text='Текст')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'hanson'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_unchanged_pages_answer_304_without_queries(self):
+        '''Проверяем, что повторный запрос с ETag получает 304,
+        не трогая базу'''
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_validators(self):
+        '''Проверяем, что после правки поста или подписки страница
+        снова отдаётся целиком'''
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+        profile = self.urls[1]
+        etag = self.reader_client.get(profile)['ETag']
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'hanson'})
+        )
+        response = self.reader_client.get(profile, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Отписаться')
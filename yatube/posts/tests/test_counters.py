@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class PostCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.group = Group.objects.create(
+            title='Первая группа',
+            slug='first',
+            description='Описание первой группы'
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая группа',
+            slug='second',
+            description='Описание второй группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assert_counters(self, author, first, second):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, author
+        )
+        self.assertEqual(self.group.posts_count, first)
+        self.assertEqual(self.other_group.posts_count, second)
+
+    def test_counters_follow_create_edit_and_delete(self):
+        '''Проверяем, что счётчики меняются при создании, смене группы
+        и удалении поста'''
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост в группе', 'group': self.group.id}
+        )
+        post = Post.objects.get()
+        self.assert_counters(1, 1, 0)
+
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': 'Пост в другой группе', 'group': self.other_group.id}
+        )
+        self.assert_counters(1, 0, 1)
+
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': 'Пост без группы'}
+        )
+        self.assert_counters(1, 0, 0)
+
+        Post.objects.create(author=self.user, text='Ещё', group=self.group)
+        Post.objects.get(pk=post.pk).delete()
+        self.assert_counters(1, 1, 0)
+
+    def test_author_cascade_delete_updates_group_counters(self):
+        '''Проверяем, что удаление автора уменьшает счётчик группы'''
+        author = User.objects.create_user(username='tom')
+        Post.objects.create(author=author, text='Пост', group=self.group)
+        author.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertFalse(AuthorStats.objects.filter(author_id=author.id))
+
+    def test_deleting_bulk_created_post_keeps_counters_non_negative(self):
+        '''Проверяем, что удаление поста из bulk_create, не учтённого
+        в счётчиках, не уводит их ниже нуля'''
+        AuthorStats.objects.create(author=self.user)
+        Post.objects.bulk_create(
+            [Post(text='Пост', author=self.user, group=self.group)]
+        )
+        Post.objects.get().delete()
+        self.assert_counters(0, 0, 0)
+
+    def test_recount_command_repairs_counters(self):
+        '''Проверяем, что команда recount_posts чинит счётчики после
+        bulk_create, который обходит сигналы'''
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=self.user, group=self.group)
+            for i in range(7)
+        ])
+        self.assertFalse(AuthorStats.objects.filter(author=self.user))
+        call_command('recount_posts', stdout=StringIO())
+        self.assert_counters(7, 7, 0)
+
+    def test_pages_show_counters_without_count_query(self):
+        '''Проверяем, что страницы показывают счётчики без COUNT(*)'''
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        urls = {
+            reverse('posts:post_detail', kwargs={'post_id': post.id}): 1,
+            reverse('posts:profile', kwargs={'username': 'hanson'}): 2,
+            reverse('posts:group_list', kwargs={'slug': 'first'}): 2,
+        }
+        for url, queries in urls.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = Client().get(url)
+                self.assertContains(response, 'постов')
+                self.assertContains(response, ': 1')
@@ -0,0 +1,135 @@
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.management.commands.bench_db import PROFILES, temporary_database
+from core.management.commands.sync_replicas import copy_database
+
+from ..export import export_rows
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ExportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.moderator = User.objects.create_user(
+            username='moderator', is_staff=True
+        )
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(7)
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+        self.profile_export = reverse(
+            'posts:profile_export', kwargs={'username': 'hanson'}
+        )
+
+    def test_rows_are_read_in_chunks_up_to_start_snapshot(self):
+        '''Проверяем, что выгрузка идёт порциями и не включает посты,
+        добавленные после её начала'''
+        rows = export_rows(Post.objects.all(), chunk_size=3)
+        with self.assertNumQueries(2):
+            first = next(rows)
+        Post.objects.create(author=self.user, text='Поздний пост')
+        with self.assertNumQueries(2):
+            rest = list(rows)
+        self.assertEqual(
+            [row['text'] for row in [first] + rest],
+            [f'Пост {i}' for i in range(7)]
+        )
+
+    def test_export_endpoints_stream_and_check_access(self):
+        '''Проверяем формат выгрузки и доступ: профиль — автору
+        и модераторам, группа — только модераторам'''
+        response = self.author_client.get(self.profile_export)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['text'], 'Пост 0')
+        self.assertEqual(len(lines), 7)
+
+        group_export = reverse(
+            'posts:group_export', kwargs={'slug': 'group_slug'}
+        )
+        moderator_client = Client()
+        moderator_client.force_login(self.moderator)
+        response = moderator_client.get(group_export, {'format': 'csv'})
+        rows = list(csv.DictReader(
+            b''.join(response.streaming_content).decode().splitlines()
+        ))
+        self.assertEqual(rows[-1]['group'], 'group_slug')
+        self.assertEqual(len(rows), 7)
+
+        self.assertEqual(self.author_client.get(group_export).status_code, 403)
+        other_client = Client()
+        other_client.force_login(User.objects.create_user(username='tom'))
+        self.assertEqual(
+            other_client.get(self.profile_export).status_code, 403
+        )
+
+    def test_export_command_writes_import_format(self):
+        '''Проверяем, что команда выгружает поля, которые понимает
+        import_posts'''
+        out = StringIO()
+        call_command('export_posts', '--author', 'hanson', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(
+            set(json.loads(lines[0])),
+            {'id', 'pub_date', 'author', 'group', 'text'}
+        )
+
+
+class ExportSnapshotTests(TransactionTestCase):
+    # Выгрузка читает копию базы в файле под профилем production, а
+    # другое соединение пишет в неё; TestCase держал бы свою транзакцию.
+    def test_writes_do_not_wait_for_streaming_export(self):
+        '''Проверяем, что запись во время выгрузки не ждёт её конца,
+        а выгрузка до конца видит посты такими, какими они были'''
+        user = User.objects.create_user(username='hanson')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Пост {i}') for i in range(5)
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'db.sqlite3')
+        connections['default'].ensure_connection()
+        copy_database(connections['default'].connection, path)
+
+        settings_dict = {**PROFILES['production'], 'NAME': path}
+        with temporary_database('export', settings_dict):
+            rows = export_rows(Post.objects.using('export'), chunk_size=2)
+            first = next(rows)
+            writer = sqlite3.connect(path, timeout=0, isolation_level=None)
+            self.addCleanup(writer.close)
+            writer.execute("UPDATE posts_post SET text = 'Изменён'")
+            writer.execute(
+                'DELETE FROM posts_post WHERE id = (SELECT MAX(id) '
+                'FROM posts_post)'
+            )
+            rest = list(rows)
+        self.assertEqual(
+            [row['text'] for row in [first] + rest],
+            [f'Пост {i}' for i in range(5)]
+        )
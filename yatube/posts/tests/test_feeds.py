@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SyndicationFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other_slug',
+            description='Описание другой группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text='Первый пост', group=self.group
+        )
+        self.urls = {
+            'index_rss': reverse('posts:index_rss'),
+            'index_atom': reverse('posts:index_atom'),
+            'group_rss': reverse(
+                'posts:group_rss', kwargs={'slug': 'group_slug'}
+            ),
+            'group_atom': reverse(
+                'posts:group_atom', kwargs={'slug': 'group_slug'}
+            ),
+            'author_rss': reverse(
+                'posts:author_rss', kwargs={'username': 'hanson'}
+            ),
+            'author_atom': reverse(
+                'posts:author_atom', kwargs={'username': 'hanson'}
+            ),
+        }
+
+    def test_feeds_list_posts_and_answer_304(self):
+        '''Проверяем содержимое лент и ответ 304 без запросов к базе'''
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                response = self.client.get(url)
+                content_type = 'atom' if name.endswith('atom') else 'rss'
+                self.assertIn(content_type, response['Content-Type'])
+                self.assertContains(response, 'Первый пост')
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_feed_regenerated_only_for_its_scope(self):
+        '''Проверяем, что новый пост обновляет ленты своей области,
+        а ленту другой группы оставляет в кэше'''
+        other_url = reverse('posts:group_rss', kwargs={'slug': 'other_slug'})
+        for url in [*self.urls.values(), other_url]:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.user, text='Второй пост', group=self.group
+        )
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                self.assertContains(self.client.get(url), 'Второй пост')
+        with self.assertNumQueries(0):
+            self.client.get(other_url)
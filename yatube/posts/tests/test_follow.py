@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs.queue import run_batch
+
+from ..models import AuthorStats, Follow, Post, TimelineEntry
+from ..timeline import HOT_AUTHOR_POSTS, timeline_size
+
+User = get_user_model()
+
+
+class FollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='hanson')
+        cls.hot_author = User.objects.create_user(username='graphoman')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.follow_url = reverse('posts:follow_index')
+
+    def follow(self, author):
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': author})
+        )
+
+    def feed_texts(self, params=None):
+        page = self.reader_client.get(
+            self.follow_url, params
+        ).context['page_obj']
+        return [post.text for post in page], page
+
+    def test_follow_and_unfollow(self):
+        '''Проверяем подписку, отписку и запрет подписки на себя'''
+        self.follow('hanson')
+        self.follow('hanson')
+        self.follow('reader')
+        self.assertEqual(
+            list(Follow.objects.values_list('user', 'author')),
+            [(self.reader.pk, self.author.pk)]
+        )
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'hanson'})
+        )
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        '''Проверяем, что новый пост попадает в ленту подписчика,
+        а после отписки пропадает из неё'''
+        Post.objects.create(author=self.author, text='Старый пост')
+        self.follow('hanson')
+        Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(author=self.hot_author, text='Чужой пост')
+        self.assertEqual(self.feed_texts()[0], ['Новый пост', 'Старый пост'])
+        self.assertEqual(TimelineEntry.objects.count(), 2)
+
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'hanson'})
+        )
+        self.assertEqual(self.feed_texts()[0], [])
+
+    def test_hot_author_merged_on_read(self):
+        '''Проверяем, что посты плодовитого автора не раскладываются
+        по лентам, а подмешиваются при чтении без повторов'''
+        self.follow('hanson')
+        self.follow('graphoman')
+        for i in range(8):
+            Post.objects.create(author=self.author, text=f'Автор {i}')
+            Post.objects.create(author=self.hot_author, text=f'Горячий {i}')
+        AuthorStats.objects.filter(author=self.hot_author).update(
+            posts_count=HOT_AUTHOR_POSTS
+        )
+        Post.objects.create(author=self.hot_author, text='Горячий 8')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__text='Горячий 8').exists()
+        )
+
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'text', flat=True
+            )
+        )
+        texts, page = self.feed_texts()
+        while page.has_next():
+            older, page = self.feed_texts({'after': page.older_cursor})
+            texts.extend(older)
+        self.assertEqual(texts, expected)
+        self.assertEqual(
+            self.feed_texts({'page': 2})[0], expected[10:20]
+        )
+
+    def test_timeline_size_counts_hot_author_once(self):
+        '''Проверяем, что разложенные до «нагрева» посты горячего
+        автора не считаются в размере ленты дважды'''
+        self.follow('graphoman')
+        for i in range(3):
+            Post.objects.create(author=self.hot_author, text=f'Пост {i}')
+        AuthorStats.objects.filter(author=self.hot_author).update(
+            posts_count=HOT_AUTHOR_POSTS
+        )
+        self.assertEqual(timeline_size(self.reader), HOT_AUTHOR_POSTS)
+
+    def test_timeline_size_is_not_counted_on_every_page(self):
+        '''Проверяем, что COUNT ленты не повторяется на каждой странице,
+        а подписка сразу меняет размер ленты'''
+        self.follow('hanson')
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}') for i in range(15)
+        )
+        self.follow('graphoman')
+        Post.objects.create(author=self.hot_author, text='Чужой пост')
+        _, page = self.feed_texts()
+        self.assertEqual(page.paginator.count, 1)
+
+        # bulk_create не раскладывает посты: подписка заново
+        # подтягивает последние посты автора в ленту.
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'hanson'})
+        )
+        self.follow('hanson')
+        _, page = self.feed_texts()
+        self.assertEqual(page.paginator.count, 16)
+        with CaptureQueriesContext(connection) as queries:
+            _, page = self.feed_texts({'after': page.older_cursor})
+        self.assertEqual(page.paginator.count, 16)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_cooled_down_author_posts_return_to_timeline(self):
+        '''Проверяем, что посты, написанные автором в «горячий» период,
+        раскладываются по лентам, когда он остывает'''
+        self.follow('graphoman')
+        AuthorStats.objects.create(
+            author=self.hot_author, posts_count=HOT_AUTHOR_POSTS
+        )
+        Post.objects.create(author=self.hot_author, text='Горячий пост')
+        doomed = Post.objects.create(author=self.hot_author, text='Удалить')
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        # Удаление опускает автора ровно на порог.
+        AuthorStats.objects.filter(author=self.hot_author).update(
+            posts_count=HOT_AUTHOR_POSTS
+        )
+        doomed.delete()
+        cache.clear()
+        self.assertEqual(run_batch(), (1, 0))
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('post__text', flat=True)),
+            ['Горячий пост']
+        )
+        self.assertEqual(self.feed_texts()[0], ['Горячий пост'])
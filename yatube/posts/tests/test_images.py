@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+from ..thumbnails import SIZES, generate, thumbnail_name
+
+User = get_user_model()
+
+
+def make_image(name='photo.png', size=(1600, 1200), color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.settings_override.enable()
+        cls.user = User.objects.create_user(username='hanson')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, name='photo.png'):
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': make_image(name)}
+        )
+        return Post.objects.latest('pk')
+
+    def test_feed_shows_placeholder_until_thumbnails_are_ready(self):
+        '''Проверяем, что до нарезки превью лента показывает заглушку,
+        а после — только готовое превью, без ссылки на оригинал'''
+        post = self.create_post()
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertFalse(post.thumbnails_ready)
+        feed_url = settings.MEDIA_URL + thumbnail_name(post.image.name, 'feed')
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'Картинка обрабатывается')
+        self.assertNotContains(response, feed_url)
+
+        self.assertTrue(generate(post.pk))
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'Картинка обрабатывается')
+        self.assertContains(response, feed_url)
+        self.assertNotContains(response, post.image.url)
+        for size, dimensions in SIZES.items():
+            path = os.path.join(
+                self.media_root, thumbnail_name(post.image.name, size)
+            )
+            with Image.open(path) as thumbnail:
+                self.assertEqual(thumbnail.size, dimensions)
+
+    def test_new_image_resets_thumbnails(self):
+        '''Проверяем, что замена картинки снимает отметку о готовых
+        превью, а правка текста — нет'''
+        post = self.create_post()
+        generate(post.pk)
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        self.client.post(edit_url, {'text': 'Новый текст'})
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        self.client.post(
+            edit_url,
+            {'text': 'Новый текст', 'image': make_image('other.png')}
+        )
+        post.refresh_from_db()
+        self.assertIn('other', post.image.name)
+        self.assertFalse(post.thumbnails_ready)
+
+    def test_images_with_same_stem_get_own_thumbnails(self):
+        '''Проверяем, что у cat.png и cat.jpg разные превью и команда
+        generate_thumbnails нарезает оставшиеся без превью посты'''
+        png, jpg = self.create_post('cat.png'), self.create_post('cat.jpg')
+        self.assertNotEqual(
+            thumbnail_name(png.image.name, 'feed'),
+            thumbnail_name(jpg.image.name, 'feed')
+        )
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('постов: 2', out.getvalue())
+        self.assertEqual(
+            Post.objects.filter(thumbnails_ready=True).count(), 2
+        )
+        for post in (png, jpg):
+            self.assertTrue(os.path.exists(os.path.join(
+                self.media_root, thumbnail_name(post.image.name, 'feed')
+            )))
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+
+    def import_file(self, suffix, content, *args, batch_size=2):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, '--batch-size', str(batch_size), *args,
+            stdout=out, stderr=err
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl_import_keeps_dates_and_counters(self):
+        '''Проверяем загрузку JSONL: даты сохраняются, плохие строки
+        пропускаются, счётчики пересчитываются'''
+        records = [
+            {'text': f'Пост {i}', 'author': 'hanson', 'group': 'group_slug',
+             'pub_date': f'2020-01-0{i + 1}T12:00:00+00:00'}
+            for i in range(3)
+        ]
+        lines = [json.dumps(record) for record in records]
+        lines.insert(1, '{битая строка')
+        lines.append(json.dumps({'text': 'Без автора'}))
+        lines.extend(['123', '[]', '"текст"', 'null'])
+        out, err = self.import_file('.jsonl', '\n'.join(lines))
+
+        self.assertIn('Готово: 3', out)
+        self.assertIn('пропущено 6', out)
+        self.assertEqual(err.count('Строка'), 6)
+        self.assertEqual(
+            list(Post.objects.values_list('text', 'pub_date__day')),
+            [('Пост 2', 3), ('Пост 1', 2), ('Пост 0', 1)]
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 3
+        )
+
+    def test_malformed_fields_skip_only_their_records(self):
+        '''Проверяем, что неверная дата и поля не той формы пропускают
+        запись, а не прерывают загрузку'''
+        good = {'text': 'Годный пост', 'author': 'hanson'}
+        records = [
+            {**good, 'pub_date': '2020-13-45T00:00:00'},
+            {**good, 'pub_date': 1577836800},
+            {**good, 'author': ['hanson']},
+            {**good, 'group': ['group_slug']},
+            {**good, 'text': {'body': 'текст'}},
+            good,
+        ]
+        out, err = self.import_file(
+            '.jsonl', '\n'.join(json.dumps(record) for record in records),
+            '--create-missing'
+        )
+        self.assertIn('Готово: 1', out)
+        self.assertIn('пропущено 5', out)
+        self.assertIn('неверная pub_date', err)
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Годный пост']
+        )
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_csv_import_creates_missing_authors_and_groups(self):
+        '''Проверяем, что с --create-missing CSV заводит новых авторов
+        и группы, а без флага такие строки пропускаются'''
+        content = (
+            'text,author,group\n'
+            'Первый,newbie,new_group\n'
+            'Второй,hanson,\n'
+        )
+        self.import_file('.csv', content)
+        self.assertEqual(Post.objects.count(), 1)
+
+        self.import_file('.csv', content, '--create-missing')
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.author.username, 'newbie')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.group.slug, 'new_group')
+
+    def test_large_batch_is_split_into_allowed_inserts(self):
+        '''Проверяем, что пачка больше лимита параметров SQLite
+        вставляется несколькими INSERT, а не одним'''
+        lines = [
+            json.dumps({'text': f'Пост {i}', 'author': 'hanson'})
+            for i in range(400)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            out, _ = self.import_file(
+                '.jsonl', '\n'.join(lines), batch_size=1000
+            )
+        self.assertIn('Готово: 400', out)
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "posts_post"')
+        ]
+        self.assertGreater(len(inserts), 1)
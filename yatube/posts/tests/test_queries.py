@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.test import TestCase
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.testing import QueryBudgetMixin
+
+from ..models import Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+# Сколько запросов к базе допускается на каждую страницу проекта:
+# для гостя (None, если страница только для авторизованных) и для
+# авторизованного пользователя без учёта чтения сессии и User.
+QUERY_BUDGETS = {
+    'posts:index': (1, 1),
+    'posts:group_list': (2, 2),
+    'posts:profile': (2, 3),
+    'posts:post_detail': (1, 1),
+    'posts:post_create': (None, 1),
+    'posts:post_edit': (None, 2),
+    'posts:follow_index': (None, 3),
+    'posts:profile_follow': (None, 1),
+    'posts:profile_unfollow': (None, 2),
+    'posts:search': (0, 0),
+    'posts:group_export': (None, 3),
+    'posts:profile_export': (None, 3),
+    'posts:index_rss': (1, 1),
+    'posts:index_atom': (1, 1),
+    'posts:group_rss': (2, 2),
+    'posts:group_atom': (2, 2),
+    'posts:author_rss': (2, 2),
+    'posts:author_atom': (2, 2),
+    'posts:api_index': (1, 1),
+    'posts:api_post_detail': (1, 1),
+    'posts:api_group_list': (2, 2),
+    'posts:api_profile': (2, 2),
+    'users:login': (0, 0),
+    'users:logout': (0, None),
+    'users:signup': (0, 0),
+    'users:password_change_form': (None, 0),
+    'users:password_change_done': (None, 0),
+    'users:password_reset_form': (0, 0),
+    'users:password_reset_done': (0, 0),
+    'users:password_reset_confirm': (5, 4),
+    'users:password_reset_complete': (0, 0),
+    'about:author': (0, 0),
+    'about:tech': (0, 0),
+    'metrics': (0, 0),
+    'static': (0, None),
+}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = QUERY_BUDGETS
+    exact_budgets = True
+    # Пустой размер обязателен: на одной странице блок пагинации
+    # не выводится, и запрос, который он тянет, иначе не виден.
+    data_sizes = (0, 25)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='hanson', first_name='Ханс', last_name='Хансон',
+            is_staff=True
+        )
+        cls.login_user = cls.user
+        cls.other_author = User.objects.create_user(username='tom')
+        Follow.objects.create(user=cls.user, author=cls.other_author)
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Первый пост',
+            group=cls.group
+        )
+
+    def url_kwargs(self):
+        # Подписка на себя ничего не меняет, поэтому follow/unfollow
+        # можно обходить, не сбивая остальные замеры.
+        return {
+            'username': self.user.username,
+            'slug': self.group.slug,
+            'post_id': self.post.id,
+            'uidb64': urlsafe_base64_encode(force_bytes(self.user.pk)),
+            'token': default_token_generator.make_token(self.user),
+            'path': 'css/bootstrap.min.css',
+        }
+
+    def add_data(self, size):
+        Post.objects.bulk_create([
+            Post(
+                text=f'Текст поста {i+1}',
+                author=(self.user, self.other_author)[i % 2],
+                group=self.group
+            )
+            for i in range(size)
+        ])
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user=self.user, post=post, pub_date=post.pub_date
+                )
+                for post in self.other_author.posts.all()
+            ],
+            ignore_conflicts=True
+        )
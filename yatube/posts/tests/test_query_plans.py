@@ -0,0 +1,98 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+from ..timeline import backfill
+
+User = get_user_model()
+
+# Полный проход по таблице без индекса или сортировка во временном
+# B-дереве означают, что лента перестала ходить по индексам.
+BAD_PLAN_PATTERNS = (
+    re.compile(r'\bSCAN (TABLE )?\w+$'),
+    re.compile(r'USE TEMP B-TREE'),
+)
+
+
+class FeedQueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='group_slug',
+            description='Описание группы'
+        )
+        Post.objects.bulk_create([
+            Post(
+                text=f'Текст поста {i+1}',
+                author=cls.user,
+                group=cls.group if i % 2 else None
+            )
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_plans_use_indexes(self, url, params=None, client=None):
+        client = client or self.guest_client
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        for query in queries.captured_queries:
+            for step in self.explain(query['sql']):
+                for pattern in BAD_PLAN_PATTERNS:
+                    self.assertIsNone(
+                        pattern.search(step),
+                        f'{url}: «{step}» в плане запроса {query["sql"]}'
+                    )
+        return response.context['page_obj']
+
+    def test_feed_queries_use_indexes(self):
+        '''Проверяем, что запросы лент не сканируют таблицу целиком
+        и не сортируют во временном B-дереве'''
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group_slug'}),
+            reverse('posts:profile', kwargs={'username': 'hanson'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                page = self.assert_plans_use_indexes(url)
+                older = self.assert_plans_use_indexes(
+                    url, {'after': page.older_cursor}
+                )
+                self.assert_plans_use_indexes(
+                    url, {'before': older.newer_cursor}
+                )
+                self.assert_plans_use_indexes(url, {'page': 2})
+
+    def test_follow_feed_uses_timeline_index(self):
+        '''Проверяем, что лента подписок листается по индексу ленты
+        читателя, а не сортирует все его записи'''
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        backfill(reader, self.user)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:follow_index')
+        page = self.assert_plans_use_indexes(url, client=client)
+        older = self.assert_plans_use_indexes(
+            url, {'after': page.older_cursor}, client
+        )
+        self.assert_plans_use_indexes(
+            url, {'before': older.newer_cursor}, client
+        )
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='hanson', email='hanson@yatube.ru', password='pass'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Морской котик ловит рыбу'
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Котик номер {i}', author=cls.user) for i in range(12)
+        ])
+        Post.objects.create(author=cls.user, text='Про собак')
+
+    def setUp(self):
+        self.url = reverse('posts:search')
+
+    def test_search_view_ranks_and_paginates(self):
+        '''Проверяем, что поиск находит посты по словам и префиксам
+        и делит выдачу на страницы'''
+        response = self.client.get(self.url, {'q': 'КОТ'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
+        self.assertEqual(len(response.context['page_obj']), 10)
+        response = self.client.get(self.url, {'q': 'кот рыб'})
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+
+    def test_search_index_follows_edits_and_deletes(self):
+        '''Проверяем, что индекс обновляется при правке и удалении'''
+        post = Post.objects.get(text='Про собак')
+        post.text = 'Про енотов'
+        post.save()
+        self.assertEqual(
+            self.client.get(self.url, {'q': 'собак'}).context[
+                'page_obj'
+            ].paginator.count,
+            0
+        )
+        self.assertContains(self.client.get(self.url, {'q': 'енот'}), 'енотов')
+        post.delete()
+        self.assertNotContains(
+            self.client.get(self.url, {'q': 'енот'}), 'енотов'
+        )
+
+    def test_search_query_is_sanitized(self):
+        '''Проверяем, что синтаксис FTS5 во вводе не ломает поиск'''
+        for query in ('"', 'котик OR', 'NEAR(', '*', ''):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.client.get(self.url, {'q': query}).status_code, 200
+                )
+
+    def test_admin_search_uses_index(self):
+        '''Проверяем, что поиск в админке идёт через полнотекстовый индекс'''
+        admin_client = Client()
+        admin_client.force_login(self.user)
+        response = admin_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'морской'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertIn(
+            'posts_post_fts',
+            str(response.context['cl'].queryset.query)
+        )
+
+    def test_admin_search_without_words_finds_nothing(self):
+        '''Проверяем, что поиск в админке из одних знаков препинания
+        не падает, а ничего не находит'''
+        admin_client = Client()
+        admin_client.force_login(self.user)
+        for query in ('!!!', '"', '*'):
+            with self.subTest(query=query):
+                response = admin_client.get(
+                    reverse('admin:posts_post_changelist'), {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['cl'].result_count, 0)
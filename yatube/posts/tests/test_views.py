@@ -1,8 +1,14 @@
+import http
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Group, Post
+from ..paginators import CountedKeysetPaginator
 
 User = get_user_model()
 
@@ -221,3 +227,110 @@ class PagesAndContext(TestCase):
                 response = self.authorized_user_author.get(page)
                 post = response.context[posts][0]
                 self.assertEqual(post.id, test_post.id, error)
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        Post.objects.bulk_create([
+            Post(text=f'Текст поста {i+1}', author=cls.user)
+            for i in range(25)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('posts:index')
+
+    def test_cursors_walk_whole_feed(self):
+        '''Проверяем, что курсоры «старые/новые» обходят всю ленту
+        без пропусков и повторов'''
+        seen = []
+        page = self.guest_client.get(self.url).context['page_obj']
+        seen.extend(post.id for post in page)
+        while page.has_next():
+            page = self.guest_client.get(
+                self.url, {'after': page.older_cursor}
+            ).context['page_obj']
+            seen.extend(post.id for post in page)
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+        newer = self.guest_client.get(
+            self.url, {'before': page.newer_cursor}
+        ).context['page_obj']
+        self.assertEqual([post.id for post in newer], expected[10:20])
+
+    def test_feed_does_not_count_posts(self):
+        '''Проверяем, что лента не выполняет COUNT(*)'''
+        page = self.guest_client.get(self.url).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(self.url, {'after': page.older_cursor})
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_legacy_page_links(self):
+        '''Проверяем, что ?page=N работает для неглубоких страниц'''
+        response = self.guest_client.get(self.url, {'page': 3})
+        self.assertEqual(len(response.context['page_obj']), 5)
+        self.assertFalse(response.context['page_obj'].has_next())
+        self.assertEqual(
+            self.guest_client.get(self.url, {'page': 'abc'}).status_code,
+            http.HTTPStatus.OK
+        )
+        self.assertEqual(
+            self.guest_client.get(self.url, {'page': 100}).status_code,
+            http.HTTPStatus.NOT_FOUND
+        )
+
+
+class CountedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hanson')
+        Post.objects.bulk_create([
+            Post(text=f'Текст поста {i+1}', author=cls.user)
+            for i in range(25)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_sources(self):
+        '''Проверяем, откуда пагинатор берёт число записей'''
+        posts = Post.objects.all()
+        with self.assertNumQueries(0):
+            paginator = CountedKeysetPaginator(posts, 10, count=7)
+            self.assertEqual(paginator.count, 7)
+            self.assertFalse(paginator.is_approximate)
+
+        paginator = CountedKeysetPaginator(posts, 10, estimate=True)
+        Post.objects.filter(pk=Post.objects.earliest('pk').pk).delete()
+        with self.assertNumQueries(1) as queries:
+            self.assertEqual(paginator.count, 25)
+        self.assertNotIn('COUNT(', queries.captured_queries[0]['sql'])
+        self.assertTrue(paginator.is_approximate)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(CountedKeysetPaginator(posts, 10).count, 24)
+        with self.assertNumQueries(0):
+            self.assertEqual(CountedKeysetPaginator(posts, 10).count, 24)
+
+    def test_page_range_limited_to_shallow_pages(self):
+        '''Проверяем, что номера страниц не уходят глубже OFFSET-лимита'''
+        paginator = CountedKeysetPaginator(Post.objects.all(), 10, count=500)
+        self.assertEqual(
+            list(paginator.shallow_page_range),
+            list(range(1, paginator.max_offset_page + 1))
+        )
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'около 25')
+        self.assertContains(response, '?page=3')
+        self.assertNotContains(response, '?page=4')
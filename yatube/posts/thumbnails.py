@@ -0,0 +1,102 @@
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps
+
+from .cache import feed_tags, invalidate_tags, post_tags
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Фиксированный набор превью: имя -> (ширина, высота). Ленты и страница
+# поста ссылаются только на них, оригинал в разметку не попадает.
+SIZES = {
+    'feed': (640, 360),
+    'detail': (1280, 720),
+}
+THUMBNAILS_DIR = 'thumbs'
+JPEG_QUALITY = 85
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_name(image_name, size):
+    """Имя превью в хранилище. Выводится из полного имени оригинала,
+    уникального в хранилище, поэтому превью разных картинок не
+    совпадают, а для ссылки не нужно ни запросов, ни обращений к диску."""
+    return posixpath.join(THUMBNAILS_DIR, size, f'{image_name}.jpg')
+
+
+def thumbnail_url(post, size):
+    """Адрес готового превью или пустая строка, пока оно нарезается."""
+    if not post.image or not post.thumbnails_ready:
+        return ''
+    return default_storage.url(thumbnail_name(post.image.name, size))
+
+
+def render_thumbnail(image, size):
+    thumbnail = ImageOps.fit(image, SIZES[size], Image.LANCZOS)
+    buffer = BytesIO()
+    thumbnail.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def generate(post_id):
+    """Нарезает все превью поста и помечает их готовыми.
+
+    Если картинку успели заменить, пометка не ставится: новую нарежет
+    задача, поставленная при её сохранении.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return False
+    with post.image.open('rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    for size in SIZES:
+        name = thumbnail_name(post.image.name, size)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, render_thumbnail(image, size))
+    updated = Post.objects.filter(
+        pk=post_id, image=post.image.name
+    ).update(thumbnails_ready=True)
+    if updated:
+        invalidate_tags(*post_tags(post), *feed_tags(post))
+    return bool(updated)
+
+
+def _run(post_id):
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось нарезать превью поста %s', post_id)
+    finally:
+        # Поток живёт долго, а соединение с базой у каждого своё.
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+        return _executor
+
+
+def schedule(post_id):
+    """Ставит нарезку превью в фоновый пул; запрос её не ждёт."""
+    return get_executor().submit(_run, post_id)
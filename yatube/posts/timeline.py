@@ -0,0 +1,193 @@
+from django.core.cache import cache
+
+from .cache import tags_version
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginators import MergedFeed
+
+# Посты авторов, написавших больше HOT_AUTHOR_POSTS записей, не
+# раскладываются по лентам подписчиков: такие ленты дочитываются
+# из индекса (author, pub_date, id) при каждом запросе.
+HOT_AUTHOR_POSTS = 1000
+# Сколько последних постов автора попадает в ленту при подписке.
+BACKFILL_POSTS = 100
+BATCH_SIZE = 500
+SIZE_KEY = 'posts:timeline_size:{}:{}:{}'
+# Сколько секунд число записей в ленте читателя берётся из кэша.
+SIZE_TIMEOUT = 60
+
+
+def is_hot(author_id):
+    return AuthorStats.objects.filter(
+        author_id=author_id, posts_count__gte=HOT_AUTHOR_POSTS
+    ).exists()
+
+
+def _write_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_hot(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator():
+        batch.append(TimelineEntry(
+            user_id=user_id, post=post, pub_date=post.pub_date
+        ))
+        if len(batch) >= BATCH_SIZE:
+            _write_entries(batch)
+            batch = []
+    _write_entries(batch)
+
+
+def _recent_posts(author_id):
+    return list(
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date', '-pk')
+        .values_list('pk', 'pub_date')[:BACKFILL_POSTS]
+    )
+
+
+def backfill(user, author):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    if is_hot(author.pk):
+        return
+    _write_entries([
+        TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in _recent_posts(author.pk)
+    ])
+
+
+def cooled_down(author_id):
+    """Автор только что опустился ниже порога горячих."""
+    return AuthorStats.objects.filter(
+        author_id=author_id, posts_count=HOT_AUTHOR_POSTS - 1
+    ).exists()
+
+
+def refill_followers(author_id):
+    """Раскладывает последние посты остывшего автора по лентам всех
+    его подписчиков: пока автор был горячим, его посты читались при
+    каждом запросе и в ленты не попадали."""
+    posts = _recent_posts(author_id)
+    follower_ids = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator():
+        batch.extend(
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        )
+        if len(batch) >= BATCH_SIZE:
+            _write_entries(batch)
+            batch = []
+    _write_entries(batch)
+
+
+def drop(user, author):
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def followed_hot_authors(user):
+    """Горячие авторы из подписок читателя: id -> число постов."""
+    return dict(
+        AuthorStats.objects.filter(
+            author__following__user=user,
+            posts_count__gte=HOT_AUTHOR_POSTS
+        ).values_list('author_id', 'posts_count')
+    )
+
+
+class TimelineSource:
+    """Разложенные посты читателя как источник для MergedFeed.
+
+    Фильтры и сортировка по pub_date и pk переводятся на копию даты
+    и post_id в TimelineEntry: страница берётся из индекса
+    (user, pub_date, post), а посты подтягиваются по первичному ключу.
+    """
+
+    FIELDS = {'pk': 'post_id', 'id': 'post_id'}
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def _field(self, name):
+        sign = '-' if name.startswith('-') else ''
+        head, sep, rest = name.lstrip('-').partition('__')
+        return sign + self.FIELDS.get(head, head) + sep + rest
+
+    def _lookups(self, lookups):
+        return {self._field(key): value for key, value in lookups.items()}
+
+    def filter(self, **lookups):
+        return TimelineSource(self.entries.filter(**self._lookups(lookups)))
+
+    def exclude(self, **lookups):
+        return TimelineSource(self.entries.exclude(**self._lookups(lookups)))
+
+    def select_related(self, *fields):
+        return TimelineSource(self.entries.select_related(
+            *(f'post__{field}' for field in fields)
+        ))
+
+    def order_by(self, *fields):
+        return TimelineSource(
+            self.entries.order_by(*(self._field(field) for field in fields))
+        )
+
+    def reverse(self):
+        return TimelineSource(self.entries.reverse())
+
+    def count(self):
+        return self.entries.count()
+
+    def __getitem__(self, index):
+        return [entry.post for entry in self.entries[index]]
+
+
+def timeline_feed(user, hot_authors=None):
+    """Лента подписок: разложенные посты плюс свежие посты горячих
+    авторов, слитые по дате публикации."""
+    if hot_authors is None:
+        hot_authors = followed_hot_authors(user)
+    sources = [
+        TimelineSource(
+            TimelineEntry.objects.filter(user=user).select_related('post')
+        )
+    ]
+    sources.extend(
+        Post.objects.filter(author_id=author_id) for author_id in hot_authors
+    )
+    return MergedFeed(*sources).select_related('author', 'group')
+
+
+def timeline_size(user, hot_authors=None):
+    """Число постов в ленте. Разложенные посты горячих авторов уже
+    учтены в их счётчиках и второй раз не считаются.
+
+    Ленту никто не обрезает, поэтому COUNT её записей считается не чаще
+    раза в SIZE_TIMEOUT секунд, как COUNT в CountedKeysetPaginator.
+    Подписка и отписка сбрасывают тег читателя, а с ним и это число.
+    """
+    if hot_authors is None:
+        hot_authors = followed_hot_authors(user)
+    key = SIZE_KEY.format(
+        user.pk,
+        tags_version([f'reader:{user.pk}']),
+        ','.join(map(str, sorted(hot_authors)))
+    )
+    entries_count = cache.get(key)
+    if entries_count is None:
+        entries = TimelineEntry.objects.filter(user=user)
+        if hot_authors:
+            entries = entries.exclude(post__author_id__in=list(hot_authors))
+        entries_count = entries.count()
+        cache.set(key, entries_count, SIZE_TIMEOUT)
+    return entries_count + sum(hot_authors.values())
@@ -1,36 +1,71 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import PostForm
-from .models import Group, Post
+from .archive import author_feed, get_post_or_archived, group_feed
+from .cache import (
+    cache_for_anonymous,
+    conditional_page,
+    invalidate_tags,
+    page_tags,
+    post_tags
+)
+from .export import FORMATS, export_rows
+from .forms import PostForm, PostImageForm
+from .models import AuthorStats, Follow, Group, Post
+from .paginators import CountedKeysetPaginator
+from .search import SearchResults
+from .timeline import (
+    backfill,
+    drop,
+    followed_hot_authors,
+    timeline_feed,
+    timeline_size
+)
 
 User = get_user_model()
 
 
-def posts_on_page(request, posts):
-    paginator = Paginator(posts, 10)
-    page = request.GET.get('page')
-    return paginator.get_page(page)
+def posts_on_page(request, posts, **count_options):
+    paginator = CountedKeysetPaginator(posts, 10, **count_options)
+    page = paginator.get_page_from_request(request)
+    if hasattr(request, 'cache_tags'):
+        request.cache_tags.update(page_tags(page))
+    return page
 
 
+def author_posts_count(author):
+    try:
+        return author.stats.posts_count
+    except AuthorStats.DoesNotExist:
+        return 0
+
+
+@conditional_page
+@cache_for_anonymous
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.all()
+    request.cache_tags.add('feed:index')
+    posts = Post.objects.select_related('author', 'group')
     context = {
-        'page_obj': posts_on_page(request, posts),
+        'page_obj': posts_on_page(request, posts, estimate=True),
     }
     return render(request, template, context)
 
 
+@conditional_page
+@cache_for_anonymous
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    request.cache_tags.update((f'group:{group.pk}', f'feed:group:{group.pk}'))
+    posts = group_feed(group).select_related('author', 'group')
     context = {
         'group': group,
-        'page_obj': posts_on_page(request, posts),
+        'page_obj': posts_on_page(request, posts, count=group.posts_count),
     }
     return render(request, template, context)
 
@@ -39,53 +74,167 @@ def group_posts(request, slug):
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None)
+    image_form = PostImageForm(
+        request.POST or None, request.FILES or None, instance=form.instance
+    )
+    context = {'form': form, 'image_form': image_form}
     if request.method == 'POST':
-        if form.is_valid():
+        if form.is_valid() and image_form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
             post.save()
             return redirect('posts:profile', username=request.user.username)
-        return render(request, template, {'form': form})
-    return render(request, template, {'form': form})
+        return render(request, template, context)
+    return render(request, template, context)
 
 
 @login_required
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'), pk=post_id)
     form = PostForm(
         request.POST or None,
         instance=post
     )
+    image_form = PostImageForm(
+        request.POST or None, request.FILES or None, instance=post
+    )
     if request.user == post.author:
         if request.method == 'POST':
-            if form.is_valid():
+            if form.is_valid() and image_form.is_valid():
                 post = form.save(commit=False)
                 post.author = request.user
                 post.save()
                 return redirect('posts:post_detail', post_id=post_id)
-            return render(request, template, {'form': form})
+            return render(
+                request, template, {'form': form, 'image_form': image_form}
+            )
         context = {
             'form': form,
+            'image_form': image_form,
             'is_edit': 'is_edit'
         }
         return render(request, template, context)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@conditional_page
+@cache_for_anonymous
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_archived(post_id, 'author__stats', 'group')
+    request.cache_tags.update(post_tags(post))
+    request.cache_tags.add(f'feed:author:{post.author_id}')
     context = {'post': post}
     return render(request, template, context)
 
 
+@conditional_page
+@cache_for_anonymous
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    request.cache_tags.update(
+        (f'author:{author.pk}', f'feed:author:{author.pk}')
+    )
+    posts = author_feed(author).select_related('author', 'group')
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author
+    ).exists()
     context = {
         'author': author,
-        'page_obj': posts_on_page(request, posts),
+        'following': following,
+        'page_obj': posts_on_page(
+            request, posts, count=author_posts_count(author)
+        ),
+    }
+    return render(request, template, context)
+
+
+@login_required
+def follow_index(request):
+    template = 'posts/follow.html'
+    # Размер ленты берётся сразу, а не только при выводе блока страниц:
+    # так лента стоит одинаково на одной странице и на многих. COUNT
+    # записей при этом кэшируется (timeline_size).
+    hot_authors = followed_hot_authors(request.user)
+    context = {
+        'page_obj': posts_on_page(
+            request,
+            timeline_feed(request.user, hot_authors),
+            count=timeline_size(request.user, hot_authors)
+        ),
     }
     return render(request, template, context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        _, created = Follow.objects.get_or_create(
+            user=request.user, author=author
+        )
+        if created:
+            backfill(request.user, author)
+            invalidate_tags(f'reader:{request.user.pk}')
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author=author
+    ).delete()
+    if deleted:
+        drop(request.user, author)
+        invalidate_tags(f'reader:{request.user.pk}')
+    return redirect('posts:profile', username=username)
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(SearchResults(query), 10)
+    context = {
+        'query': query,
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, template, context)
+
+
+def export_response(request, posts, name):
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        raise Http404(f'Неизвестный формат: {fmt}')
+    render_rows, content_type = FORMATS[fmt]
+    response = StreamingHttpResponse(
+        render_rows(export_rows(posts)), content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{fmt}"'
+    )
+    return response
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(
+        request, author_feed(author), f'posts-{author.username}'
+    )
+
+
+@login_required
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(request, group_feed(group), f'group-{group.slug}')
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import get_user
+
+User = get_user_model()
+
+
+def load_user(user_id):
+    # Только с основной базы: отставшая реплика вернула бы хэш пароля
+    # до его смены.
+    return User._default_manager.using(DEFAULT_DB_ALIAS).filter(
+        pk=user_id
+    ).first()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    AuthenticationMiddleware зовёт get_user на каждом запросе; с этим
+    бэкендом авторизованный запрос не ходит в базу, пока пользователя
+    не сохранят.
+    """
+
+    def get_user(self, user_id):
+        user = get_user(user_id, load_user)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,85 @@
+import pickle
+import threading
+import uuid
+
+from django.core.cache import caches
+
+# Кэш, общий для всех процессов: в нём версии пользователей и их копии.
+SHARED_ALIAS = 'shared'
+VERSION_KEY = 'users:version:{}'
+USER_KEY = 'users:user:{}:{}'
+USER_TIMEOUT = 60 * 60
+# Сколько пользователей помнит процесс, прежде чем начать заново.
+LOCAL_MAX_USERS = 1000
+
+# id пользователя -> (версия, pickle пользователя). Процесс отдаёт
+# отсюда, только если версия совпала с общей: после смены пароля
+# в одном процессе остальные увидят новую версию уже на следующем
+# запросе.
+_local = {}
+_local_lock = threading.Lock()
+
+
+def shared_cache():
+    return caches[SHARED_ALIAS]
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _remember(user_id, version, data):
+    with _local_lock:
+        if len(_local) >= LOCAL_MAX_USERS:
+            _local.clear()
+        _local[user_id] = (version, data)
+
+
+def get_user(user_id, load):
+    """Пользователь из кэша; при промахе — load(user_id) из базы.
+
+    Каждый раз возвращается отдельная копия: запросы не делят между
+    собой изменяемый объект. Прочитанное из базы кладётся под ту
+    версию, что была до чтения: если пользователя тем временем
+    сохранили, версия уже другая и устаревшую копию никто не найдёт.
+    """
+    cache = shared_cache()
+    version_key = VERSION_KEY.format(user_id)
+    version = cache.get(version_key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(version_key, version, USER_TIMEOUT):
+            version = cache.get(version_key)
+    local = _local.get(user_id)
+    if local is not None and local[0] == version:
+        return pickle.loads(local[1])
+    data = cache.get(USER_KEY.format(user_id, version))
+    if data is None:
+        user = load(user_id)
+        if user is None:
+            return None
+        data = pickle.dumps(user)
+        cache.set(USER_KEY.format(user_id, version), data, USER_TIMEOUT)
+    _remember(user_id, version, data)
+    return pickle.loads(data)
+
+
+def invalidate_user(user_id):
+    """Выдаёт пользователю новую версию и возвращает её: все копии
+    под прежней версией больше не находятся ни в одном процессе."""
+    version = _new_version()
+    shared_cache().set(VERSION_KEY.format(user_id), version, USER_TIMEOUT)
+    with _local_lock:
+        _local.pop(user_id, None)
+    return version
+
+
+def refresh_user(user_id, load):
+    """Запись в кэш после сохранения: новая версия и свежая копия."""
+    version = invalidate_user(user_id)
+    user = load(user_id)
+    if user is not None:
+        shared_cache().set(
+            USER_KEY.format(user_id, version), pickle.dumps(user),
+            USER_TIMEOUT
+        )
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import load_user
+from .cache import invalidate_user, refresh_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def write_through_user(sender, instance, **kwargs):
+    """Обновляет кэш пользователя при любом сохранении: вход (last_login),
+    смена или сброс пароля, правка профиля.
+
+    Версия меняется сразу, а после коммита пользователь перечитывается
+    из базы под ещё одной новой версией: копия, прочитанная другим
+    запросом до коммита, не переживёт смену пароля.
+    """
+    user_id = instance.pk
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: refresh_user(user_id, load_user))
+
+
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
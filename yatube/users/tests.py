@@ -1 +1,78 @@
-# Create your tests here.
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from . import cache as user_cache
+from .backends import load_user
+
+User = get_user_model()
+
+
+class AuthCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='hanson', password='old-password'
+        )
+
+    def setUp(self):
+        user_cache.shared_cache().clear()
+        user_cache._local.clear()
+
+    def test_authorized_request_skips_session_and_user_queries(self):
+        '''Проверяем, что сессия и пользователь берутся из кэша'''
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('about:author'))
+        with self.assertNumQueries(0):
+            response = client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_cached_copy_checked_against_shared_version(self):
+        '''Проверяем, что копия процесса отдаётся, лишь пока версия
+        в общем кэше не поменялась'''
+        load = mock.Mock(side_effect=load_user)
+        first = user_cache.get_user(self.user.pk, load)
+        second = user_cache.get_user(self.user.pk, load)
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+        # Пользователя сохранили в другом процессе.
+        user_cache.shared_cache().set(
+            user_cache.VERSION_KEY.format(self.user.pk), 'другая'
+        )
+        user_cache.get_user(self.user.pk, load)
+        self.assertEqual(load.call_count, 2)
+
+    def test_password_change_ends_other_sessions(self):
+        '''Проверяем, что после смены пароля закэшированный
+        пользователь не пускает по старым сессиям'''
+        changer, other = Client(), Client()
+        for client in (changer, other):
+            client.force_login(self.user)
+            client.get(reverse('about:author'))
+        response = changer.post(reverse('users:password_change_form'), {
+            'old_password': 'old-password',
+            'new_password1': 'new-secret-42',
+            'new_password2': 'new-secret-42',
+        })
+        self.assertEqual(response.status_code, 302)
+        response = changer.get(reverse('about:author'))
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+        response = other.get(reverse('about:author'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_shared_cache_is_shared_between_processes(self):
+        '''Проверяем, что общий кэш не живёт в памяти процесса
+        и разделяет записи разных баз'''
+        cache = user_cache.shared_cache()
+        self.assertNotIsInstance(cache, LocMemCache)
+        key = cache.make_key('users:version:1')
+        with mock.patch.dict(connection.settings_dict, {'NAME': 'db.sqlite3'}):
+            self.assertNotEqual(cache.make_key('users:version:1'), key)
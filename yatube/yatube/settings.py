@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -23,7 +25,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'y+30=5y72m=u74-s0l2vl9j*y#h25ws9(agrmyhw1)@on73m6c'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -33,6 +35,12 @@ ALLOWED_HOSTS = [
 ]
 
 
+# С этих адресов доступна выгрузка метрик /metrics/.
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -40,6 +48,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,6 +58,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,10 +75,21 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Без DEBUG шаблоны компилируются один раз на воркер
+            # (см. core.template_loaders.warm_up в wsgi.py).
+            'loaders': [
+                (
+                    'core.template_loaders.Loader',
+                    [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ],
+                    not DEBUG,
+                ),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -91,6 +113,83 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+if not DEBUG:
+    # Профиль для многопоточного WSGI-сервера: WAL, mmap, synchronous
+    # и busy_timeout на каждом соединении (core.db.backends.sqlite3),
+    # запись берёт блокировку в начале транзакции, соединения живут
+    # между запросами и проверяются перед повторным использованием.
+    DATABASES['default'].update({
+        'ENGINE': 'core.db.backends.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv('DJANGO_CONN_MAX_AGE', '600')),
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    })
+
+# Реплики для чтения лент: пути к копиям базы через запятую, например
+# DJANGO_READ_REPLICAS=db_replica.sqlite3. Копии обновляет команда
+# sync_replicas; без них всё читается с default.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.getenv('DJANGO_READ_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, name.strip()),
+        # sync_replicas подменяет файл целиком; долгоживущее соединение
+        # так и читало бы прежнюю копию.
+        'CONN_MAX_AGE': 0,
+        # В тестах реплика — та же тестовая база.
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Чьи вью читают с реплик; остальные всегда читают с default.
+REPLICA_VIEW_MODULES = ('posts.views', 'posts.api', 'posts.feeds')
+# Сколько секунд после записи пользователь читает только то, что уже
+# содержит его запись.
+REPLICA_PIN_SECONDS = 30
+# Реплика, которую не обновляли дольше, считается отставшей.
+REPLICA_MAX_LAG = 300
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+# default — кэш процесса для страниц и фрагментов; shared — общий для
+# всех процессов (файловый или memcached): в нём сессии, пользователи,
+# версии тегов кэша постов и моменты синхронизации реплик. Их нельзя
+# сбрасывать в каждом процессе отдельно: выход, смена пароля и правка
+# поста должны действовать сразу во всех воркерах, а sync_replicas,
+# import_posts и run_jobs пишут из отдельных процессов.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.getenv(
+            'DJANGO_SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'DJANGO_SHARED_CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache', 'shared')
+        ),
+        'KEY_FUNCTION': 'core.cache.database_key',
+    },
+}
+if not DEBUG and CACHES['shared']['BACKEND'].endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'Кэш shared должен быть общим для процессов: LocMemCache у каждого '
+        'воркера свой, и выход или смена пароля действовали бы только в нём'
+    )
+
+# Сессия читается из общего кэша, а пишется и в него, и в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+
+# Пользователь сессии тоже берётся из кэша, см. users.cache.
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
 
 
 # Password validation
@@ -131,10 +230,28 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+if not DEBUG:
+    # collectstatic вписывает хэши в имена и кладёт рядом .gz; шаблоны
+    # получают хэшированные адреса через {% static %}.
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь задач, запрос не ждёт отправки; доставляет
+# их команда run_jobs через JOBS_EMAIL_BACKEND.
+EMAIL_BACKEND = 'jobs.backends.QueuedEmailBackend'
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Потоки, которые нарезают превью загруженных картинок.
+THUMBNAIL_WORKERS = int(os.getenv('DJANGO_THUMBNAIL_WORKERS', '2'))
+# Первая пауза перед повтором упавшей задачи, дальше она удваивается.
+JOBS_RETRY_DELAY = 30
+# Через сколько секунд задача, взятая упавшим обработчиком, снова
+# достаётся другим.
+JOBS_LOCK_TIMEOUT = 600
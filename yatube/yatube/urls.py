@@ -13,13 +13,25 @@ Including another URLconf
    1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import metrics, static_file
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics, name='metrics'),
+    path(
+        f'{settings.STATIC_URL.strip("/")}/<path:path>',
+        static_file,
+        name='static'
+    ),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls', namespace='posts'))
 ]
+# Загруженные картинки в разработке; в бою их раздаёт веб-сервер.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)